@@ -4,14 +4,102 @@
 提供詳細的回測績效指標計算和分析功能
 """
 
-import math
+import array
+import sys
 import backtrader as bt
+import numpy as np
 import pandas as pd
 from collections import OrderedDict
 from datetime import datetime
+from pathlib import Path
 from typing import Dict, Any, List, Tuple
 from loguru import logger
 
+# 直接以腳本執行時，加入專案根目錄以匯入本地模組
+if not __package__:
+    sys.path.append(str(Path(__file__).resolve().parent.parent))
+
+from utils._njit import njit, NUMBA_AVAILABLE
+
+
+# backtrader 的日期數值為自西元 1 年 1 月 1 日起算的序數 (小數部分為時間)
+# 1970-01-01 的序數為 719163
+_BT_EPOCH_ORDINAL = 719163
+
+# 交易明細欄位與其資料型別 (交易記錄以欄為單位儲存)
+TRADE_COLUMNS = (
+    ('entry_date', 'datetime64[ns]'),
+    ('exit_date', 'datetime64[ns]'),
+    ('symbol', object),
+    ('size', np.float64),
+    ('entry_price', np.float64),
+    ('exit_price', np.float64),
+    ('pnl', np.float64),
+    ('pnl_comm', np.float64),
+    ('commission', np.float64),
+    ('duration', np.int64),
+    ('return_pct', np.float64),
+)
+
+# 回測中逐筆寫入的原始交易記錄 (預先配置的結構化陣列，容量不足時加倍)
+_TRADE_LOG_DTYPE = np.dtype([
+    ('dtopen', np.float64),
+    ('dtclose', np.float64),
+    ('symbol', object),
+    ('size', np.float64),
+    ('price', np.float64),
+    ('pnl', np.float64),
+    ('pnl_comm', np.float64),
+    ('commission', np.float64),
+])
+
+# 每檔股票預先配置的交易筆數
+_TRADES_PER_DATA = 32
+
+
+def _num2datetime64(values: np.ndarray) -> np.ndarray:
+    """
+    批次將 backtrader 日期數值轉換為 datetime64 (與 bt.num2date 相同，精確至微秒)
+    
+    Args:
+        values (np.ndarray): backtrader 日期數值
+        
+    Returns:
+        np.ndarray: datetime64[ns] 陣列
+    """
+    microseconds = np.rint((values - _BT_EPOCH_ORDINAL) * 86_400_000_000).astype(np.int64)
+    return microseconds.astype('datetime64[us]').astype('datetime64[ns]')
+
+
+@njit(cache=True, fastmath=True)
+def _drawdown_stats(pv: np.ndarray) -> Tuple[float, int]:
+    """
+    單次走訪淨值序列，計算最大回撤與最長回撤期間 (numba 編譯核心)
+    
+    Args:
+        pv (np.ndarray): 資產淨值序列
+        
+    Returns:
+        Tuple[float, int]: (最大回撤比例, 最長回撤期間)
+    """
+    peak = pv[0]
+    max_dd = 0.0
+    duration = 0
+    max_duration = 0
+    for i in range(pv.size):
+        value = pv[i]
+        if value > peak:
+            peak = value
+            duration = 0
+        else:
+            duration += 1
+            if duration > max_duration:
+                max_duration = duration
+            dd = (peak - value) / peak
+            if dd > max_dd:
+                max_dd = dd
+    return max_dd, max_duration
+
 
 class CustomMetricsAnalyzer(bt.Analyzer):
     """
@@ -36,24 +124,24 @@ class CustomMetricsAnalyzer(bt.Analyzer):
         self.start_date = None
         self.end_date = None
         
-        # 淨值追蹤
-        self.portfolio_values = []
-        self.dates = []
+        # 淨值追蹤 (array.array 直接儲存 C double，不需為每筆淨值建立 float 物件)
+        self.portfolio_values = array.array('d')
         
-        # 交易記錄
-        self.trades = []
-        self.winning_trades = []
-        self.losing_trades = []
+        # 交易記錄：依股票數預先配置，以游標逐筆寫入，stop() 時取已寫入部分轉為各欄位陣列
+        self._trade_log = np.empty(max(len(self.datas), 1) * _TRADES_PER_DATA, dtype=_TRADE_LOG_DTYPE)
+        self._n_trades = 0
+        self._build_trade_arrays()
+        self._aggregate_trades()
         
-        # 回撤計算
-        self.peak_value = 0
+        # 回撤計算 (於 stop() 時一次計算)
         self.max_drawdown = 0
         self.max_drawdown_duration = 0
-        self.current_drawdown_duration = 0
-        self.in_drawdown = False
         
-        # 日報酬率
-        self.daily_returns = []
+        # 日報酬率 (於 stop() 時由淨值序列計算)
+        self._rets = np.empty(0, dtype=np.float64)
+        
+        # 分析結果快取 (回測結束後結果不再變動)
+        self._analysis_cache = None
         
         logger.debug("自訂績效分析器初始化完成")
     
@@ -61,62 +149,38 @@ class CustomMetricsAnalyzer(bt.Analyzer):
         """回測開始時執行"""
         # self.start_value 不在此處初始化
         # self.start_date 不在此處初始化
-        self.peak_value = self.strategy.broker.getvalue() # 峰值可以先設為初始資金
         
         logger.info(f"分析器啟動 - 初始資金: {self.strategy.broker.getvalue():,.2f}")
 
     def next(self):
         """每個交易日執行"""
-        # 首次執行 next 時，記錄開始資訊
-        if self.start_date is None:
+        if not self.portfolio_values:
+            # 首次執行 next 時，記錄開始日期
             self.start_date = self.strategy.datetime.date(0)
-            self.start_value = self.strategy.broker.getvalue()
-            self.peak_value = self.start_value
-            logger.info(f"回測資料開始 - 日期: {self.start_date}, 資金: {self.start_value:,.2f}")
-
-        current_value = self.strategy.broker.getvalue()
-        current_date = self.strategy.datetime.date(0)
-        
-        # 記錄淨值和日期
-        self.portfolio_values.append(current_value)
-        self.dates.append(current_date)
+            logger.info(f"回測資料開始 - 日期: {self.start_date}")
         
-        # 計算日報酬率
-        if len(self.portfolio_values) > 1:
-            daily_return = (current_value - self.portfolio_values[-2]) / self.portfolio_values[-2]
-            self.daily_returns.append(daily_return)
-        
-        # 更新最大回撤
-        self._update_drawdown(current_value)
+        # 只記錄淨值，其餘指標於 stop() 時計算
+        self.portfolio_values.append(self.strategy.broker.getvalue())
     
     def notify_trade(self, trade):
         """交易完成通知"""
         if trade.isclosed:
-            # 記錄交易資訊
-            entry_date = bt.num2date(trade.dtopen)
-            exit_date = bt.num2date(trade.dtclose)
-            
-            trade_info = {
-                'entry_date': entry_date,
-                'exit_date': exit_date,
-                'symbol': trade.data._name,
-                'size': trade.size,
-                'entry_price': trade.price,
-                'exit_price': trade.pnlcomm / trade.size + trade.price if trade.size != 0 else 0,
-                'pnl': trade.pnl,
-                'pnl_comm': trade.pnlcomm,
-                'commission': trade.commission,
-                'duration': (exit_date - entry_date).days,
-                'return_pct': trade.pnl / (abs(trade.size) * trade.price) * 100 if trade.price != 0 and trade.size != 0 else 0
-            }
+            # 容量不足時加倍 (攤銷 O(1))
+            if self._n_trades == self._trade_log.size:
+                self._trade_log = np.resize(self._trade_log, self._trade_log.size * 2)
             
-            self.trades.append(trade_info)
-            
-            # 分類盈虧交易
-            if trade.pnlcomm > 0:
-                self.winning_trades.append(trade_info)
-            elif trade.pnlcomm < 0:
-                self.losing_trades.append(trade_info)
+            # 只記錄原始數值，日期轉換與衍生欄位於 stop() 時批次計算
+            self._trade_log[self._n_trades] = (
+                trade.dtopen,
+                trade.dtclose,
+                trade.data._name,
+                trade.size,
+                trade.price,
+                trade.pnl,
+                trade.pnlcomm,
+                trade.commission,
+            )
+            self._n_trades += 1
             
             logger.debug(f"交易記錄: {trade.data._name} PnL: {trade.pnlcomm:.2f}")
     
@@ -125,35 +189,110 @@ class CustomMetricsAnalyzer(bt.Analyzer):
         self.end_value = self.strategy.broker.getvalue()
         self.end_date = self.strategy.datetime.date(0)
         
+        # 零複製的 NumPy 檢視
+        pv = np.frombuffer(self.portfolio_values, dtype=np.float64)
+        if pv.size:
+            self.start_value = float(pv[0])
+        
+        # 計算日報酬率
+        if pv.size > 1:
+            self._rets = np.diff(pv) / pv[:-1]
+        
+        # 計算回撤
+        self._calculate_drawdown(pv)
+        
+        # 整理交易記錄並計算彙總數值
+        self._build_trade_arrays()
+        self._aggregate_trades()
+        self._analysis_cache = None
+        
         logger.info(f"回測結束 - 最終資金: {self.end_value:,.2f}")
     
-    def _update_drawdown(self, current_value: float):
+    def _build_trade_arrays(self) -> None:
+        """將逐筆交易記錄轉換為以欄位為單位的 NumPy 陣列，並批次計算衍生欄位"""
+        log = self._trade_log[:self._n_trades]
+        size = log['size']
+        price = log['price']
+        pnl = log['pnl']
+        pnl_comm = log['pnl_comm']
+        
+        entry_date = _num2datetime64(log['dtopen'])
+        exit_date = _num2datetime64(log['dtclose'])
+        
+        with np.errstate(divide='ignore', invalid='ignore'):
+            exit_price = np.where(size != 0, pnl_comm / size + price, 0.0)
+            return_pct = np.where((price != 0) & (size != 0), pnl / (np.abs(size) * price) * 100, 0.0)
+        
+        columns = {
+            'entry_date': entry_date,
+            'exit_date': exit_date,
+            'symbol': log['symbol'],
+            'size': size,
+            'entry_price': price,
+            'exit_price': exit_price,
+            'pnl': pnl,
+            'pnl_comm': pnl_comm,
+            'commission': log['commission'],
+            'duration': (exit_date - entry_date) // np.timedelta64(1, 'D'),
+            'return_pct': return_pct,
+        }
+        
+        self.trades = {
+            name: np.asarray(columns[name], dtype=dtype)
+            for name, dtype in TRADE_COLUMNS
+        }
+    
+    def _aggregate_trades(self) -> None:
+        """一次計算所有交易彙總數值並快取，供各項指標共用"""
+        pnl_comm = self.trades['pnl_comm']
+        wins = pnl_comm[pnl_comm > 0]
+        losses = pnl_comm[pnl_comm < 0]
+        has_trades = pnl_comm.size > 0
+        
+        self._trade_totals = {
+            'total_trades': pnl_comm.size,
+            'winning_trades': wins.size,
+            'losing_trades': losses.size,
+            'total_profit': float(wins.sum()),
+            'total_loss': float(-losses.sum()),
+            'avg_win': float(wins.mean()) if wins.size else 0.0,
+            'avg_loss': float(losses.mean()) if losses.size else 0.0,
+            'best_trade': float(pnl_comm.max()) if has_trades else 0.0,
+            'worst_trade': float(pnl_comm.min()) if has_trades else 0.0,
+            'avg_duration': float(self.trades['duration'].mean()) if has_trades else 0.0,
+            'total_commission': float(self.trades['commission'].sum()),
+        }
+    
+    def _calculate_drawdown(self, pv: np.ndarray) -> None:
         """
-        更新回撤計算
+        計算最大回撤與最長回撤期間
+        
+        已安裝 numba 時使用編譯後的 _drawdown_stats，否則使用 NumPy 向量化計算
         
         Args:
-            current_value (float): 當前資產淨值
+            pv (np.ndarray): 資產淨值序列
         """
-        if current_value > self.peak_value:
-            # 創新高
-            self.peak_value = current_value
-            if self.in_drawdown:
-                self.in_drawdown = False
-                self.current_drawdown_duration = 0
-        else:
-            # 在回撤中
-            if not self.in_drawdown:
-                self.in_drawdown = True
-            
-            self.current_drawdown_duration += 1
-            self.max_drawdown_duration = max(
-                self.max_drawdown_duration, 
-                self.current_drawdown_duration
-            )
-            
-            # 計算當前回撤
-            current_drawdown = (self.peak_value - current_value) / self.peak_value
-            self.max_drawdown = max(self.max_drawdown, current_drawdown)
+        if not pv.size:
+            return
+        
+        if NUMBA_AVAILABLE:
+            max_dd, max_duration = _drawdown_stats(pv)
+            self.max_drawdown = float(max_dd)
+            self.max_drawdown_duration = int(max_duration)
+            return
+        
+        peak = np.maximum.accumulate(pv)
+        drawdown = 1.0 - pv / peak
+        self.max_drawdown = float(drawdown.max())
+        
+        # 以連續未創新高的區段長度計算回撤期間 (持平前高亦計入)：
+        # 記錄每個位置之前最近一次創新高的索引，兩者相減即為目前回撤長度
+        prev_peak = np.concatenate((pv[:1], peak[:-1]))
+        under = pv <= prev_peak
+        idx = np.arange(pv.size)
+        last_reset = np.maximum.accumulate(np.where(under, -1, idx))
+        run_len = idx - last_reset
+        self.max_drawdown_duration = int(run_len.max())
     
     def _calculate_cagr(self) -> float:
         """
@@ -192,29 +331,28 @@ class CustomMetricsAnalyzer(bt.Analyzer):
         """
         計算夏普比率
         
+        以日超額報酬的平均值除以其標準差，再乘上 sqrt(252) 年化
+        
         Args:
             risk_free_rate (float): 無風險利率 (年化)
             
         Returns:
             float: 夏普比率
         """
-        if not self.daily_returns or len(self.daily_returns) < 2:
+        rets = self._rets
+        if rets.size < 2:
             return 0.0
         
-        # 計算年化報酬率
-        mean_daily_return = sum(self.daily_returns) / len(self.daily_returns)
-        annual_return = (1 + mean_daily_return) ** 252 - 1
+        # 年化無風險利率換算為日利率: (1 + rf) ** (1/252) - 1
+        rf_daily = np.expm1(np.log1p(risk_free_rate) / 252)
+        excess = rets - rf_daily
         
-        # 計算年化標準差
-        variance = sum([(r - mean_daily_return) ** 2 for r in self.daily_returns]) / (len(self.daily_returns) - 1)
-        daily_std = math.sqrt(variance)
-        annual_std = daily_std * math.sqrt(252)
-        
-        if annual_std == 0:
+        daily_std = excess.std(ddof=1)
+        if daily_std == 0:
             return 0.0
         
-        sharpe = (annual_return - risk_free_rate) / annual_std
-        return sharpe
+        sharpe = excess.mean() / daily_std * np.sqrt(252)
+        return float(sharpe)
     
     def _calculate_win_rate(self) -> float:
         """
@@ -223,12 +361,11 @@ class CustomMetricsAnalyzer(bt.Analyzer):
         Returns:
             float: 勝率百分比
         """
-        total_trades = len(self.trades)
+        total_trades = self._trade_totals['total_trades']
         if total_trades == 0:
             return 0.0
         
-        winning_trades = len(self.winning_trades)
-        return winning_trades / total_trades * 100
+        return self._trade_totals['winning_trades'] / total_trades * 100
     
     def _calculate_profit_factor(self) -> float:
         """
@@ -237,8 +374,8 @@ class CustomMetricsAnalyzer(bt.Analyzer):
         Returns:
             float: 獲利因子
         """
-        total_profit = sum(trade['pnl_comm'] for trade in self.winning_trades)
-        total_loss = abs(sum(trade['pnl_comm'] for trade in self.losing_trades))
+        total_profit = self._trade_totals['total_profit']
+        total_loss = self._trade_totals['total_loss']
         
         if total_loss == 0:
             return float('inf') if total_profit > 0 else 0.0
@@ -252,10 +389,7 @@ class CustomMetricsAnalyzer(bt.Analyzer):
         Returns:
             Tuple[float, float]: (平均獲利交易, 平均虧損交易)
         """
-        avg_win = sum(trade['pnl_comm'] for trade in self.winning_trades) / len(self.winning_trades) if self.winning_trades else 0.0
-        avg_loss = sum(trade['pnl_comm'] for trade in self.losing_trades) / len(self.losing_trades) if self.losing_trades else 0.0
-        
-        return avg_win, avg_loss
+        return self._trade_totals['avg_win'], self._trade_totals['avg_loss']
     
     def _calculate_volatility(self) -> float:
         """
@@ -264,23 +398,24 @@ class CustomMetricsAnalyzer(bt.Analyzer):
         Returns:
             float: 年化波動率百分比
         """
-        if not self.daily_returns or len(self.daily_returns) < 2:
+        rets = self._rets
+        if rets.size < 2:
             return 0.0
         
-        mean_return = sum(self.daily_returns) / len(self.daily_returns)
-        variance = sum([(r - mean_return) ** 2 for r in self.daily_returns]) / (len(self.daily_returns) - 1)
-        daily_volatility = math.sqrt(variance)
-        annual_volatility = daily_volatility * math.sqrt(252)
+        annual_volatility = rets.std(ddof=1) * np.sqrt(252)
         
-        return annual_volatility * 100
+        return float(annual_volatility * 100)
     
     def get_analysis(self) -> Dict[str, Any]:
         """
-        取得分析結果
+        取得分析結果 (首次呼叫後快取結果)
         
         Returns:
             Dict[str, Any]: 完整的績效分析結果
         """
+        if self._analysis_cache is not None:
+            return self._analysis_cache
+        
         # 基本績效指標
         cagr = self._calculate_cagr()
         total_return = self._calculate_total_return()
@@ -290,17 +425,18 @@ class CustomMetricsAnalyzer(bt.Analyzer):
         avg_win, avg_loss = self._calculate_average_trade()
         volatility = self._calculate_volatility()
         
-        # 交易統計
-        total_trades = len(self.trades)
-        winning_trades = len(self.winning_trades)
-        losing_trades = len(self.losing_trades)
+        # 交易統計（於 stop() 中已彙總）
+        totals = self._trade_totals
+        total_trades = totals['total_trades']
+        winning_trades = totals['winning_trades']
+        losing_trades = totals['losing_trades']
         
         # 最大獲利/虧損交易
-        best_trade = max(self.trades, key=lambda x: x['pnl_comm'])['pnl_comm'] if self.trades else 0
-        worst_trade = min(self.trades, key=lambda x: x['pnl_comm'])['pnl_comm'] if self.trades else 0
+        best_trade = totals['best_trade']
+        worst_trade = totals['worst_trade']
         
         # 平均持倉天數
-        avg_duration = sum(trade['duration'] for trade in self.trades) / len(self.trades) if self.trades else 0
+        avg_duration = totals['avg_duration']
         
         results = OrderedDict([
             # 基本資訊
@@ -334,10 +470,11 @@ class CustomMetricsAnalyzer(bt.Analyzer):
             ('avg_duration_days', round(avg_duration, 1)),
             
             # 其他統計
-            ('total_commission', round(sum(trade['commission'] for trade in self.trades), 2)),
+            ('total_commission', round(totals['total_commission'], 2)),
             ('trading_days', len(self.portfolio_values)),
         ])
         
+        self._analysis_cache = results
         return results
     
     def get_trades_dataframe(self) -> pd.DataFrame:
@@ -347,68 +484,64 @@ class CustomMetricsAnalyzer(bt.Analyzer):
         Returns:
             pd.DataFrame: 交易明細表
         """
-        if not self.trades:
+        if not self.trades['pnl_comm'].size:
             return pd.DataFrame()
         
+        # 日期欄位於 stop() 時已轉換為 datetime64
         df = pd.DataFrame(self.trades)
         
-        # 格式化日期
-        df['entry_date'] = pd.to_datetime(df['entry_date'])
-        df['exit_date'] = pd.to_datetime(df['exit_date'])
-        
         # 排序
         df = df.sort_values('entry_date').reset_index(drop=True)
         
-        # 四捨五入數值
+        # 四捨五入數值 (一次處理所有數值欄位)
         numeric_columns = ['entry_price', 'exit_price', 'pnl', 'pnl_comm', 'commission', 'return_pct']
-        for col in numeric_columns:
-            if col in df.columns:
-                df[col] = df[col].round(2)
+        df[numeric_columns] = df[numeric_columns].round(2)
         
         return df
     
     def print_summary(self):
         """列印績效摘要"""
         results = self.get_analysis()
-        
-        print("\n" + "="*60)
-        print("             回測績效摘要報告")
-        print("="*60)
-        
-        print(f"回測期間: {results['start_date']} ~ {results['end_date']}")
-        print(f"初始資金: {results['start_value']:,.0f}")
-        print(f"最終資金: {results['end_value']:,.0f}")
-        print("-"*60)
-        
-        print("報酬指標:")
-        print(f"  總報酬率: {results['total_return_pct']:.2f}%")
-        print(f"  年化報酬率 (CAGR): {results['cagr_pct']:.2f}%")
-        print(f"  夏普比率: {results['sharpe_ratio']:.3f}")
-        print(f"  年化波動率: {results['volatility_pct']:.2f}%")
-        print("-"*60)
-        
-        print("風險指標:")
-        print(f"  最大回撤: {results['max_drawdown_pct']:.2f}%")
-        print(f"  最大回撤期間: {results['max_drawdown_duration']} 天")
-        print("-"*60)
-        
-        print("交易統計:")
-        print(f"  總交易次數: {results['total_trades']}")
-        print(f"  獲利交易: {results['winning_trades']}")
-        print(f"  虧損交易: {results['losing_trades']}")
-        print(f"  勝率: {results['win_rate_pct']:.2f}%")
-        print(f"  獲利因子: {results['profit_factor']}")
-        print("-"*60)
-        
-        print("交易明細:")
-        print(f"  平均獲利交易: {results['avg_winning_trade']:,.2f}")
-        print(f"  平均虧損交易: {results['avg_losing_trade']:,.2f}")
-        print(f"  最佳交易: {results['best_trade']:,.2f}")
-        print(f"  最差交易: {results['worst_trade']:,.2f}")
-        print(f"  平均持倉天數: {results['avg_duration_days']:.1f}")
-        print(f"  總手續費: {results['total_commission']:,.2f}")
-        
-        print("="*60)
+        separator = "-" * 60
+        
+        # 組合成單一字串後一次輸出
+        lines = [
+            "",
+            "=" * 60,
+            "             回測績效摘要報告",
+            "=" * 60,
+            f"回測期間: {results['start_date']} ~ {results['end_date']}",
+            f"初始資金: {results['start_value']:,.0f}",
+            f"最終資金: {results['end_value']:,.0f}",
+            separator,
+            "報酬指標:",
+            f"  總報酬率: {results['total_return_pct']:.2f}%",
+            f"  年化報酬率 (CAGR): {results['cagr_pct']:.2f}%",
+            f"  夏普比率: {results['sharpe_ratio']:.3f}",
+            f"  年化波動率: {results['volatility_pct']:.2f}%",
+            separator,
+            "風險指標:",
+            f"  最大回撤: {results['max_drawdown_pct']:.2f}%",
+            f"  最大回撤期間: {results['max_drawdown_duration']} 天",
+            separator,
+            "交易統計:",
+            f"  總交易次數: {results['total_trades']}",
+            f"  獲利交易: {results['winning_trades']}",
+            f"  虧損交易: {results['losing_trades']}",
+            f"  勝率: {results['win_rate_pct']:.2f}%",
+            f"  獲利因子: {results['profit_factor']}",
+            separator,
+            "交易明細:",
+            f"  平均獲利交易: {results['avg_winning_trade']:,.2f}",
+            f"  平均虧損交易: {results['avg_losing_trade']:,.2f}",
+            f"  最佳交易: {results['best_trade']:,.2f}",
+            f"  最差交易: {results['worst_trade']:,.2f}",
+            f"  平均持倉天數: {results['avg_duration_days']:.1f}",
+            f"  總手續費: {results['total_commission']:,.2f}",
+            "=" * 60,
+        ]
+        
+        print("\n".join(lines))
 
 
 def main():
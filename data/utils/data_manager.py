@@ -5,26 +5,43 @@
 """
 
 import os
-import csv
+import re
+import shutil
+import asyncio
+import tempfile
 import warnings
+from contextlib import contextmanager
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from pathlib import Path
 from typing import List, Optional, Dict, Any
 from datetime import datetime, timedelta
 
 import pandas as pd
-import yfinance as yf
-from joblib import Memory
+import pyarrow as pa
+import pyarrow.parquet as pq
 from loguru import logger
 
+try:
+    import fcntl
+except ImportError:  # Windows 無 fcntl，僅依賴原子替換
+    fcntl = None
+
 
 # 抑制 yfinance 警告
 warnings.filterwarnings('ignore', category=FutureWarning)
 
-# --- Joblib 快取設定 ---
-# 將 Memory 初始化移至模組層級，避免在類別實例中造成 PicklingError
+# --- 快取設定 ---
+# 每檔股票一個 Parquet 檔案，以 hive 分割目錄存放: {cache_dir}/symbol={股票代碼}/data.parquet
+# 檔案中繼資料記錄涵蓋的日期範圍，讀取時直接讀取該檔案並下推日期篩選
 CACHE_DIR = Path('data/cache')
-CACHE_DIR.mkdir(parents=True, exist_ok=True)
-memory = Memory(str(CACHE_DIR), verbose=0)
+CACHE_FILENAME = 'data.parquet'
+CACHE_LOCKNAME = '.lock'
+DATE_COLUMN = 'date'
+# 舊版快取檔名 (blake2b 十六進位雜湊)，清除快取時一併移除
+_LEGACY_CACHE_NAME = re.compile(r'[0-9a-f]{128}')
+
+# 批次下載時每次請求的股票數量
+BATCH_SIZE = 50
 
 
 class DownloadError(Exception):
@@ -32,7 +49,196 @@ class DownloadError(Exception):
     pass
 
 
-@memory.cache
+def _to_tw_symbol(symbol: str) -> str:
+    """為台股代碼加上 .TW 後綴"""
+    return f"{symbol}.TW" if not symbol.endswith('.TW') else symbol
+
+
+def _clean_stock_data(data: pd.DataFrame, tw_symbol: str) -> pd.DataFrame:
+    """
+    整理下載後的股票資料並檢查其有效性
+
+    Args:
+        data (pd.DataFrame): yfinance 回傳的原始資料
+        tw_symbol (str): 含 .TW 後綴的股票代碼
+
+    Returns:
+        pd.DataFrame: 整理後的股票資料
+
+    Raises:
+        DownloadError: 當資料無效時引發
+    """
+    if data.empty:
+        raise DownloadError(f"股票 {tw_symbol} 無資料")
+    
+    # 重新命名欄位為英文
+    data.columns = [col.lower() for col in data.columns]
+    
+    # 確保必要欄位存在
+    required_columns = ['open', 'high', 'low', 'close', 'volume']
+    missing_columns = [col for col in required_columns if col not in data.columns]
+    
+    if missing_columns:
+        raise DownloadError(f"股票 {tw_symbol} 缺少必要欄位: {missing_columns}")
+    
+    # 移除缺失值過多的資料
+    if data.isna().to_numpy().sum() > len(data) * 0.1:  # 缺失值超過10%
+        raise DownloadError(f"股票 {tw_symbol} 缺失值過多")
+    
+    # 前向填補缺失值 (就地填補，避免複製整個 DataFrame)
+    data.ffill(inplace=True)
+    
+    return data
+
+
+def _cache_path(cache_dir: Path, symbol: str) -> Path:
+    """
+    取得股票的快取檔案路徑 (hive 分割目錄)
+
+    Args:
+        cache_dir (Path): 快取目錄
+        symbol (str): 股票代碼
+
+    Returns:
+        Path: 快取檔案路徑
+    """
+    return cache_dir / f"symbol={symbol}" / CACHE_FILENAME
+
+
+def _cache_covers(cache_path: Path, start_date: str, end_date: str) -> bool:
+    """
+    檢查快取檔案記錄的日期範圍是否涵蓋所需期間
+
+    Args:
+        cache_path (Path): 快取檔案路徑
+        start_date (str): 開始日期
+        end_date (str): 結束日期
+
+    Returns:
+        bool: 是否涵蓋
+    """
+    if not cache_path.exists():
+        return False
+    
+    try:
+        metadata = pq.read_schema(cache_path).metadata or {}
+    except Exception as e:
+        logger.warning(f"讀取快取資訊失敗，將重新下載: {cache_path} ({str(e)})")
+        return False
+    
+    cached_start = metadata.get(b'start_date')
+    cached_end = metadata.get(b'end_date')
+    if cached_start is None or cached_end is None:
+        return False
+    
+    return (
+        pd.Timestamp(cached_start.decode()) <= pd.Timestamp(start_date)
+        and pd.Timestamp(cached_end.decode()) >= pd.Timestamp(end_date)
+    )
+
+
+def _cache_get(
+    cache_dir: Path,
+    symbols: List[str],
+    start_date: str,
+    end_date: str
+) -> Dict[str, pd.DataFrame]:
+    """
+    從快取讀取多檔股票資料
+
+    每檔股票直接讀取自己的 Parquet 檔案 (各檔案使用各自的結構描述)，日期範圍篩選直接下推至 Parquet 讀取。
+
+    Args:
+        cache_dir (Path): 快取目錄
+        symbols (List[str]): 股票代碼清單
+        start_date (str): 開始日期
+        end_date (str): 結束日期
+
+    Returns:
+        Dict[str, pd.DataFrame]: 快取命中的股票資料 (未命中或讀取失敗的股票不在字典中)
+    """
+    cached = {}
+    for symbol in symbols:
+        cache_path = _cache_path(cache_dir, symbol)
+        if not _cache_covers(cache_path, start_date, end_date):
+            continue
+        
+        try:
+            # 以資料本身的時區解讀日期 (yfinance 結束日期不含當日)
+            date_type = pq.read_schema(cache_path).field(DATE_COLUMN).type
+            start = pd.Timestamp(start_date, tz=getattr(date_type, 'tz', None))
+            end = pd.Timestamp(end_date, tz=getattr(date_type, 'tz', None))
+            
+            table = pq.read_table(
+                cache_path,
+                filters=[(DATE_COLUMN, '>=', start), (DATE_COLUMN, '<', end)],
+                partitioning=None
+            )
+        except Exception as e:
+            logger.warning(f"讀取快取失敗，將重新下載: {cache_path} ({str(e)})")
+            continue
+        
+        cached[symbol] = table.to_pandas().set_index(DATE_COLUMN).rename_axis('Date')
+    
+    return cached
+
+
+@contextmanager
+def _cache_lock(cache_path: Path):
+    """
+    取得快取檔案所在目錄的獨佔檔案鎖，避免多個執行緒/行程同時寫入同一檔股票
+
+    Args:
+        cache_path (Path): 快取檔案路徑
+    """
+    cache_path.parent.mkdir(parents=True, exist_ok=True)
+    if fcntl is None:
+        yield
+        return
+    
+    with open(cache_path.parent / CACHE_LOCKNAME, 'w') as lock_file:
+        fcntl.flock(lock_file, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+
+def _cache_put(cache_dir: Path, symbol: str, start_date: str, end_date: str, data: pd.DataFrame) -> None:
+    """
+    將股票資料寫入快取 (覆蓋該股票原有的快取)
+
+    Args:
+        cache_dir (Path): 快取目錄
+        symbol (str): 股票代碼
+        start_date (str): 資料涵蓋的開始日期
+        end_date (str): 資料涵蓋的結束日期
+        data (pd.DataFrame): 股票資料
+    """
+    cache_path = _cache_path(cache_dir, symbol)
+    
+    try:
+        table = pa.Table.from_pandas(data.rename_axis(DATE_COLUMN).reset_index(), preserve_index=False)
+        table = table.replace_schema_metadata({
+            **(table.schema.metadata or {}),
+            b'start_date': start_date.encode(),
+            b'end_date': end_date.encode()
+        })
+        
+        # 先寫入同目錄的暫存檔再原子替換，讀取端不會看到寫到一半的檔案
+        with _cache_lock(cache_path):
+            fd, tmp_path = tempfile.mkstemp(dir=cache_path.parent, prefix='.', suffix='.tmp')
+            os.close(fd)
+            try:
+                pq.write_table(table, tmp_path, compression='snappy')
+                os.replace(tmp_path, cache_path)
+            except BaseException:
+                os.unlink(tmp_path)
+                raise
+    except Exception as e:
+        logger.warning(f"寫入快取失敗: {cache_path} ({str(e)})")
+
+
 def _download_stock_data_impl(
     symbol: str,
     start_date: str,
@@ -41,7 +247,7 @@ def _download_stock_data_impl(
     retry_attempts: int = 3
 ) -> pd.DataFrame:
     """
-    實際下載股票資料的實作函數（已移至模組層級以支援快取）
+    實際下載股票資料的實作函數
 
     Args:
         symbol (str): 股票代碼
@@ -56,8 +262,11 @@ def _download_stock_data_impl(
     Raises:
         DownloadError: 當下載失敗或資料無效時引發
     """
+    # yfinance 載入成本高，僅在實際需要下載時才匯入（快取命中時不需要）
+    import yfinance as yf
+    
     # 為台股代碼加上 .TW 後綴
-    tw_symbol = f"{symbol}.TW" if not symbol.endswith('.TW') else symbol
+    tw_symbol = _to_tw_symbol(symbol)
     
     for attempt in range(retry_attempts):
         try:
@@ -71,25 +280,7 @@ def _download_stock_data_impl(
                 timeout=timeout
             )
             
-            if data.empty:
-                raise DownloadError(f"股票 {tw_symbol} 無資料")
-            
-            # 重新命名欄位為英文
-            data.columns = [col.lower() for col in data.columns]
-            
-            # 確保必要欄位存在
-            required_columns = ['open', 'high', 'low', 'close', 'volume']
-            missing_columns = [col for col in required_columns if col not in data.columns]
-            
-            if missing_columns:
-                raise DownloadError(f"股票 {tw_symbol} 缺少必要欄位: {missing_columns}")
-            
-            # 移除缺失值過多的資料
-            if data.isnull().sum().sum() > len(data) * 0.1:  # 缺失值超過10%
-                raise DownloadError(f"股票 {tw_symbol} 缺失值過多")
-            
-            # 前向填補缺失值
-            data = data.fillna(method='ffill')
+            data = _clean_stock_data(data, tw_symbol)
             
             logger.debug(f"成功下載 {tw_symbol} 資料，共 {len(data)} 筆記錄")
             return data
@@ -107,6 +298,79 @@ def _download_stock_data_impl(
     raise DownloadError(f"下載 {tw_symbol} 未知錯誤")
 
 
+def _download_batch_impl(
+    symbols: List[str],
+    start_date: str,
+    end_date: str,
+    timeout: int = 30,
+    retry_attempts: int = 3
+) -> Dict[str, pd.DataFrame]:
+    """
+    以單一請求批次下載多檔股票資料（使用 Yahoo 多檔查詢端點）
+
+    Args:
+        symbols (List[str]): 股票代碼清單
+        start_date (str): 開始日期
+        end_date (str): 結束日期
+        timeout (int): 下載超時時間(秒)
+        retry_attempts (int): 重試次數
+
+    Returns:
+        Dict[str, pd.DataFrame]: 股票代碼對應資料的字典，無效的股票不會出現在結果中
+
+    Raises:
+        DownloadError: 當批次請求最終失敗時引發
+    """
+    import yfinance as yf
+    
+    tw_symbols = {_to_tw_symbol(symbol): symbol for symbol in symbols}
+    
+    for attempt in range(retry_attempts):
+        try:
+            logger.debug(f"批次下載 {len(tw_symbols)} 檔股票 (嘗試 {attempt + 1}/{retry_attempts})")
+            
+            batch = yf.download(
+                tickers=" ".join(tw_symbols),
+                start=start_date,
+                end=end_date,
+                group_by='ticker',
+                threads=True,
+                actions=True,
+                auto_adjust=True,
+                ignore_tz=False,
+                progress=False,
+                timeout=timeout
+            )
+            break
+            
+        except Exception as e:
+            logger.warning(f"批次下載失敗 (嘗試 {attempt + 1}/{retry_attempts}): {str(e)}")
+            
+            if attempt < retry_attempts - 1:
+                import time
+                time.sleep(1)
+            else:
+                raise DownloadError(f"批次下載最終失敗: {str(e)}")
+    
+    results = {}
+    downloaded = set(batch.columns.get_level_values(0)) if not batch.empty else set()
+    
+    for tw_symbol, symbol in tw_symbols.items():
+        if tw_symbol not in downloaded:
+            continue
+        
+        # 拆出單一股票的資料，並移除該股票無交易的日期
+        data = batch.xs(tw_symbol, level=0, axis=1).dropna(how='all')
+        
+        try:
+            results[symbol] = _clean_stock_data(data, tw_symbol)
+        except DownloadError as e:
+            logger.warning(str(e))
+    
+    logger.debug(f"批次下載完成，成功 {len(results)}/{len(tw_symbols)} 檔")
+    return results
+
+
 class DataManager:
     """資料下載與快取管理器"""
     
@@ -120,7 +384,9 @@ class DataManager:
         """
         self.cache_dir = Path(cache_dir)
         self.cache_enabled = cache_enabled
-        self.memory = memory  # 使用模組層級的 memory 物件
+        
+        if self.cache_enabled:
+            self.cache_dir.mkdir(parents=True, exist_ok=True)
         
         logger.info(f"資料管理器初始化完成，快取啟用: {self.cache_enabled}")
 
@@ -143,11 +409,16 @@ class DataManager:
         Returns:
             Optional[pd.DataFrame]: 股票資料DataFrame
         """
-        if self.cache_enabled:
+        if not self.cache_enabled:
             return _download_stock_data_impl(symbol, start_date, end_date, **kwargs)
-        else:
-            # 如果禁用快取，直接呼叫函式，但不通過 memory.cache
-            return _download_stock_data_impl.__wrapped__(symbol, start_date, end_date, **kwargs)
+        
+        data = _cache_get(self.cache_dir, [symbol], start_date, end_date).get(symbol)
+        
+        if data is None:
+            data = _download_stock_data_impl(symbol, start_date, end_date, **kwargs)
+            _cache_put(self.cache_dir, symbol, start_date, end_date, data)
+        
+        return data
 
     def load_symbol_list(self, filepath: str) -> List[str]:
         """
@@ -162,9 +433,11 @@ class DataManager:
         symbol_list = []
         
         try:
-            with open(filepath, 'r', encoding='utf-8') as file:
-                reader = csv.DictReader(file)
-                symbol_list = [row['symbol'] for row in reader if row['symbol']]
+            symbol_list = (
+                pd.read_csv(filepath, usecols=['symbol'], dtype=str, encoding='utf-8')['symbol']
+                .dropna()
+                .tolist()
+            )
             
             logger.info(f"從 {filepath} 載入 {len(symbol_list)} 個股票代碼")
             
@@ -181,36 +454,196 @@ class DataManager:
         start_date: str,
         end_date: str,
         show_progress: bool = True,
+        max_workers: int = 16,
         **kwargs
     ) -> Dict[str, pd.DataFrame]:
         """
         批量下載多檔股票資料
         
+        超過 5 檔時改用 download_batch 批次下載，否則以執行緒池逐檔平行下載。
+        
+        Args:
+            symbols (List[str]): 股票代碼清單
+            start_date (str): 開始日期
+            end_date (str): 結束日期
+            show_progress (bool): 是否顯示進度
+            max_workers (int): 最大同時下載數
+            **kwargs: 其他參數
+            
+        Returns:
+            Dict[str, pd.DataFrame]: 股票代碼對應資料的字典
+        """
+        if len(symbols) > 5:
+            return self.download_batch(symbols, start_date, end_date, show_progress, **kwargs)
+        
+        downloaded = self._download_concurrently(
+            symbols, start_date, end_date, show_progress, max_workers, **kwargs
+        )
+        
+        # 依原始股票順序輸出
+        stock_data = {symbol: downloaded[symbol] for symbol in symbols if symbol in downloaded}
+        
+        logger.info(f"成功下載 {len(stock_data)}/{len(symbols)} 檔股票資料")
+        return stock_data
+    
+    async def download_multiple_async(
+        self,
+        symbols: List[str],
+        start_date: str,
+        end_date: str,
+        show_progress: bool = True,
+        **kwargs
+    ) -> Dict[str, pd.DataFrame]:
+        """
+        download_multiple_stocks 的非同步版本，供已在事件迴圈中的程式 (如 Jupyter) 以 await 呼叫
+        
+        超過 5 檔時於背景執行緒執行 download_batch 批次下載；
+        否則每檔股票各以一個背景執行緒同時下載。
+        
+        Args:
+            symbols (List[str]): 股票代碼清單
+            start_date (str): 開始日期
+            end_date (str): 結束日期
+            show_progress (bool): 是否顯示進度
+            **kwargs: 其他參數 (timeout, retry_attempts)
+            
+        Returns:
+            Dict[str, pd.DataFrame]: 股票代碼對應資料的字典
+        """
+        if len(symbols) > 5:
+            return await asyncio.to_thread(
+                self.download_batch, symbols, start_date, end_date, show_progress, **kwargs
+            )
+        
+        async def fetch_one(symbol: str) -> Optional[pd.DataFrame]:
+            try:
+                return await asyncio.to_thread(
+                    self.download_stock_data, symbol, start_date, end_date, **kwargs
+                )
+            except DownloadError as e:
+                logger.warning(f"跳過股票 {symbol}：{str(e)}")
+                return None
+        
+        results = await asyncio.gather(*(fetch_one(symbol) for symbol in symbols))
+        
+        # gather 依輸入順序回傳，結果即為原始股票順序
+        stock_data = {
+            symbol: data
+            for symbol, data in zip(symbols, results)
+            if data is not None and not data.empty
+        }
+        
+        logger.info(f"成功下載 {len(stock_data)}/{len(symbols)} 檔股票資料")
+        return stock_data
+    
+    def _download_concurrently(
+        self,
+        symbols: List[str],
+        start_date: str,
+        end_date: str,
+        show_progress: bool = True,
+        max_workers: int = 16,
+        **kwargs
+    ) -> Dict[str, pd.DataFrame]:
+        """
+        以執行緒池逐檔平行下載股票資料
+        
         Args:
             symbols (List[str]): 股票代碼清單
             start_date (str): 開始日期
             end_date (str): 結束日期
             show_progress (bool): 是否顯示進度
+            max_workers (int): 最大同時下載數
             **kwargs: 其他參數
             
+        Returns:
+            Dict[str, pd.DataFrame]: 股票代碼對應資料的字典（依完成順序）
+        """
+        downloaded = {}
+        
+        # 下載屬於 I/O 等待，使用執行緒即可在等待網路時釋放 GIL
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            futures = {
+                executor.submit(self.download_stock_data, symbol, start_date, end_date, **kwargs): symbol
+                for symbol in symbols
+            }
+            
+            futures_iter = as_completed(futures)
+            if show_progress:
+                from tqdm import tqdm
+                futures_iter = tqdm(futures_iter, total=len(futures), desc="下載股票資料")
+            
+            for future in futures_iter:
+                symbol = futures[future]
+                try:
+                    data = future.result()
+                    if data is not None and not data.empty:
+                        downloaded[symbol] = data
+                except DownloadError as e:
+                    logger.warning(f"跳過股票 {symbol}：{str(e)}")
+        
+        return downloaded
+    
+    def download_batch(
+        self,
+        symbols: List[str],
+        start_date: str,
+        end_date: str,
+        show_progress: bool = True,
+        **kwargs
+    ) -> Dict[str, pd.DataFrame]:
+        """
+        以 yf.download 批次下載多檔股票資料（每批 BATCH_SIZE 檔）
+        
+        已在快取中的股票直接讀取快取，批次中未取得資料的股票會改以單檔方式重新下載。
+        
+        Args:
+            symbols (List[str]): 股票代碼清單
+            start_date (str): 開始日期
+            end_date (str): 結束日期
+            show_progress (bool): 是否顯示進度
+            **kwargs: 其他參數 (timeout, retry_attempts)
+            
         Returns:
             Dict[str, pd.DataFrame]: 股票代碼對應資料的字典
         """
-        stock_data = {}
+        downloaded = {}
+        to_download = symbols
         
+        if self.cache_enabled:
+            downloaded = _cache_get(self.cache_dir, symbols, start_date, end_date)
+            to_download = [symbol for symbol in symbols if symbol not in downloaded]
+            
+            logger.debug(f"快取命中 {len(downloaded)}/{len(symbols)} 檔股票")
+        
+        batches = [to_download[i:i + BATCH_SIZE] for i in range(0, len(to_download), BATCH_SIZE)]
         if show_progress:
             from tqdm import tqdm
-            symbols_iter = tqdm(symbols, desc="下載股票資料")
-        else:
-            symbols_iter = symbols
+            batches = tqdm(batches, desc="批次下載股票資料")
         
-        for symbol in symbols_iter:
+        for batch in batches:
             try:
-                data = self.download_stock_data(symbol, start_date, end_date, **kwargs)
-                if data is not None and not data.empty:
-                    stock_data[symbol] = data
+                batch_data = _download_batch_impl(batch, start_date, end_date, **kwargs)
             except DownloadError as e:
-                logger.warning(f"跳過股票 {symbol}：{str(e)}")
+                logger.warning(str(e))
+                continue
+            
+            if self.cache_enabled:
+                for symbol, data in batch_data.items():
+                    _cache_put(self.cache_dir, symbol, start_date, end_date, data)
+            
+            downloaded.update(batch_data)
+        
+        # 批次中缺漏的股票改為單檔下載
+        missing = [symbol for symbol in symbols if symbol not in downloaded]
+        if missing:
+            logger.info(f"批次下載缺少 {len(missing)} 檔股票，改以單檔下載")
+            downloaded.update(
+                self._download_concurrently(missing, start_date, end_date, show_progress=False, **kwargs)
+            )
+        
+        # 依原始股票順序輸出
+        stock_data = {symbol: downloaded[symbol] for symbol in symbols if symbol in downloaded}
         
         logger.info(f"成功下載 {len(stock_data)}/{len(symbols)} 檔股票資料")
         return stock_data
@@ -225,25 +658,32 @@ class DataManager:
         Returns:
             List[str]: 合併的股票代碼清單
         """
-        all_symbols = []
+        # 以 dict 保留載入順序並去除重複的股票代碼
+        unique = {}
         
         for filepath in symbol_files:
             if os.path.exists(filepath):
-                symbols = self.load_symbol_list(filepath)
-                all_symbols.extend(symbols)
+                unique.update(dict.fromkeys(self.load_symbol_list(filepath)))
             else:
                 logger.warning(f"股票清單檔案不存在: {filepath}")
         
-        # 去除重複的股票代碼
-        unique_symbols = list(set(all_symbols))
+        unique_symbols = list(unique)
         
         logger.info(f"從 {len(symbol_files)} 個檔案載入 {len(unique_symbols)} 個唯一股票代碼")
         return unique_symbols
     
     def clear_cache(self) -> None:
         """清除所有快取資料"""
-        if self.cache_enabled and hasattr(self.memory, 'clear'):
-            self.memory.clear()
+        if self.cache_enabled and self.cache_dir.exists():
+            # 連同檔案鎖與殘留的暫存檔一併移除
+            for partition in self.cache_dir.glob('symbol=*'):
+                shutil.rmtree(partition, ignore_errors=True)
+            
+            # 舊版快取：joblib Memory 目錄與以 blake2b 雜湊命名的 parquet 檔
+            shutil.rmtree(self.cache_dir / 'joblib', ignore_errors=True)
+            for legacy_file in self.cache_dir.glob('*.parquet'):
+                if _LEGACY_CACHE_NAME.fullmatch(legacy_file.stem):
+                    legacy_file.unlink(missing_ok=True)
             logger.info("快取已清除")
         else:
             logger.info("快取未啟用或無法清除")
@@ -263,7 +703,7 @@ class DataManager:
         }
         
         if self.cache_dir.exists():
-            cache_files = list(self.cache_dir.rglob('*'))
+            cache_files = list(self.cache_dir.glob(f'symbol=*/{CACHE_FILENAME}'))
             cache_info['file_count'] = len([f for f in cache_files if f.is_file()])
             
             # 計算快取大小
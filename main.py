@@ -6,24 +6,73 @@ Backtrader 量化交易回測系統主程式
 
 import os
 import sys
+import codecs
 from pathlib import Path
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Optional, Tuple, Type
 import argparse
 
 import backtrader as bt
 import pandas as pd
+import pyarrow as pa
+import pyarrow.csv as pacsv
+from joblib import Parallel, delayed
 
 # 加入本地模組路徑
 sys.path.append(str(Path(__file__).parent))
 
 from utils.config_loader import ConfigLoader
 from utils.logger import setup_logger_from_config, create_backtest_logger
+from utils._fs import missing_files
 from data.utils.data_manager import DataManager
 from data.stock_lists.generator import StockListGenerator
-from strategies.breakout20 import get_strategy_class
+from strategies.breakout20 import get_strategy_class, prepare_signals, sweep_parameters, Breakout20Data
 from analyzers.custom_metrics import CustomMetricsAnalyzer
 
 
+def _write_csv(table: pa.Table, path: str) -> None:
+    """
+    以 pyarrow 的 C++ CSV 寫入器輸出資料表
+    
+    檔案開頭加上 UTF-8 BOM，與 encoding='utf-8-sig' 相同，Excel 可正確顯示中文
+    
+    Args:
+        table (pa.Table): 資料表
+        path (str): 輸出路徑
+    """
+    # 日期欄位只輸出日期，不含時間
+    for i, field in enumerate(table.schema):
+        if pa.types.is_timestamp(field.type):
+            table = table.set_column(i, field.name, table.column(i).cast(pa.date32()))
+    
+    with open(path, 'wb') as f:
+        f.write(codecs.BOM_UTF8)
+        pacsv.write_csv(table, f)
+
+
+def _slice_period(data: pd.DataFrame, start_date: pd.Timestamp, end_date: pd.Timestamp) -> pd.DataFrame:
+    """
+    裁切回測期間的資料
+    
+    以二分搜尋找出回測期間的位置後直接切片 (索引未依日期排序時先排序)
+    
+    Args:
+        data (pd.DataFrame): 股票資料
+        start_date (pd.Timestamp): 開始日期
+        end_date (pd.Timestamp): 結束日期 (含當日)
+        
+    Returns:
+        pd.DataFrame: 回測期間的資料
+    """
+    # searchsorted 需要已排序的索引，否則會找到錯誤的區間
+    if not data.index.is_monotonic_increasing:
+        data = data.sort_index()
+    
+    index = data.index
+    start_idx = index.searchsorted(start_date.tz_localize(index.tz), side='left')
+    end_idx = index.searchsorted(end_date.tz_localize(index.tz), side='right')
+    return data.iloc[start_idx:end_idx]
+
+
 class BacktestRunner:
     """回測執行器"""
     
@@ -63,10 +112,10 @@ class BacktestRunner:
     def _ensure_stock_lists_exist(self) -> None:
         """確保股票清單檔案存在"""
         symbol_files = self.config.get_symbol_files()
-        missing_files = [f for f in symbol_files if not os.path.exists(f)]
+        missing = missing_files(symbol_files)
         
-        if missing_files:
-            self.logger.warning(f"股票清單檔案不存在，將自動生成: {missing_files}")
+        if missing:
+            self.logger.warning(f"股票清單檔案不存在，將自動生成: {missing}")
             
             # 生成股票清單
             generator = StockListGenerator()
@@ -115,8 +164,13 @@ class BacktestRunner:
         self.logger.info(f"成功下載 {len(stock_data)} 檔股票資料")
         return stock_data
     
-    def _setup_cerebro(self) -> None:
-        """設定 Cerebro 引擎"""
+    def _setup_cerebro(self, strategy_class: Optional[Type[bt.Strategy]] = None) -> None:
+        """
+        設定 Cerebro 引擎
+        
+        Args:
+            strategy_class (Optional[Type[bt.Strategy]]): 指定策略類別，預設依設定檔選擇
+        """
         self.cerebro = bt.Cerebro()
         
         # 設定初始資金
@@ -139,20 +193,31 @@ class BacktestRunner:
         strategy_name = self.config.get_strategy_name()
         strategy_params = self.config.get_strategy_params()
         
-        if strategy_name == 'Breakout20':
-            strategy_class = get_strategy_class(optimized=False)
-            self.cerebro.addstrategy(
-                strategy_class,
-                **strategy_params
-            )
-        else:
-            raise ValueError(f"不支援的策略: {strategy_name}")
+        if strategy_class is None:
+            if strategy_name == 'Breakout20':
+                strategy_class = get_strategy_class(optimized=False)
+            else:
+                raise ValueError(f"不支援的策略: {strategy_name}")
+        
+        self.cerebro.addstrategy(
+            strategy_class,
+            **strategy_params
+        )
         
         # 添加分析器
         self.cerebro.addanalyzer(CustomMetricsAnalyzer, _name='metrics')
         
         self.logger.info(f"Cerebro 引擎設定完成 - 初始資金: {initial_cash:,.0f}")
     
+    def _get_period(self) -> Tuple[pd.Timestamp, pd.Timestamp]:
+        """
+        取得回測期間 (每次回測只解析一次日期字串，供所有股票共用)
+        
+        Returns:
+            Tuple[pd.Timestamp, pd.Timestamp]: (開始日期, 結束日期)
+        """
+        return pd.Timestamp(self.config.get_start_date()), pd.Timestamp(self.config.get_end_date())
+    
     def _add_data_feeds(self, stock_data: Dict[str, pd.DataFrame]) -> None:
         """
         添加資料來源到 Cerebro
@@ -162,15 +227,20 @@ class BacktestRunner:
         """
         self.logger.info("添加資料來源...")
         
+        # 策略訊號窗口
+        strategy_params = self.config.get_strategy_params()
+        sma_window = strategy_params.get('sma_window', 20)
+        high_window = strategy_params.get('high_window', 20)
+        
+        start_date, end_date = self._get_period()
+        
         data_count = 0
         for symbol, data in stock_data.items():
             try:
-                # 準備資料格式
-                data_feed = bt.feeds.PandasData(
-                    dataname=data,
-                    name=symbol,
-                    fromdate=pd.to_datetime(self.config.get_start_date()),
-                    todate=pd.to_datetime(self.config.get_end_date())
+                # 裁切回測期間後預先計算整段期間的指標與訊號
+                data_feed = Breakout20Data(
+                    dataname=prepare_signals(_slice_period(data, start_date, end_date), sma_window, high_window),
+                    name=symbol
                 )
                 
                 self.cerebro.adddata(data_feed)
@@ -251,7 +321,7 @@ class BacktestRunner:
             
             if not trades_df.empty:
                 # 儲存交易明細
-                trades_df.to_csv(csv_path, index=False, encoding='utf-8-sig')
+                _write_csv(pa.Table.from_pandas(trades_df, preserve_index=False), csv_path)
                 self.logger.info(f"交易明細已儲存至: {csv_path}")
                 
                 # 顯示交易明細預覽
@@ -263,8 +333,7 @@ class BacktestRunner:
             
             # 儲存績效摘要
             summary_path = csv_path.replace('.csv', '_summary.csv')
-            summary_df = pd.DataFrame([analysis])
-            summary_df.to_csv(summary_path, index=False, encoding='utf-8-sig')
+            _write_csv(pa.Table.from_pylist([dict(analysis)]), summary_path)
             self.logger.info(f"績效摘要已儲存至: {summary_path}")
             
         except Exception as e:
@@ -287,29 +356,188 @@ class BacktestRunner:
             if not stock_data:
                 raise ValueError("無有效的股票資料可用於回測")
             
-            # 3. 設定 Cerebro 引擎
-            self._setup_cerebro()
+            # 3~7. 執行回測並儲存結果
+            analysis = self._backtest(stock_data)
             
-            # 4. 添加資料來源
-            self._add_data_feeds(stock_data)
+            self.logger.info("回測流程完成")
+            return analysis
             
-            # 5. 執行回測
-            results = self._run_backtest()
+        except Exception as e:
+            self.logger.error(f"回測執行失敗: {str(e)}")
+            raise
+    
+    def _backtest(self, stock_data: Dict[str, pd.DataFrame]) -> Dict[str, Any]:
+        """
+        以 Cerebro 執行回測、分析並儲存結果
+        
+        Args:
+            stock_data (Dict[str, pd.DataFrame]): 股票資料字典
             
-            # 6. 分析結果
-            analysis = self._analyze_results(results)
+        Returns:
+            Dict[str, Any]: 回測結果
+        """
+        # 設定 Cerebro 引擎
+        self._setup_cerebro()
+        
+        # 添加資料來源
+        self._add_data_feeds(stock_data)
+        
+        # 執行回測
+        results = self._run_backtest()
+        
+        # 分析結果
+        analysis = self._analyze_results(results)
+        
+        # 儲存結果
+        self._save_results(results, analysis)
+        
+        return analysis
+    
+    def run_vectorized(self, param_grid: List[Tuple[int, int]]) -> pd.DataFrame:
+        """
+        以向量化模式掃描策略參數
+        
+        所有參數組合不經 backtrader 一次計算，只以最佳參數組合執行一次完整回測，
+        輸出交易明細與績效摘要。
+        
+        Args:
+            param_grid (List[Tuple[int, int]]): (sma_window, high_window) 參數組合清單
+            
+        Returns:
+            pd.DataFrame: 各參數組合的交易統計，依交易報酬總和由高至低排序
+        """
+        try:
+            symbols = self._load_stock_symbols()
+            stock_data = self._download_data(symbols)
+            
+            if not stock_data:
+                raise ValueError("無有效的股票資料可用於回測")
             
-            # 7. 儲存結果
-            self._save_results(results, analysis)
+            start_date, end_date = self._get_period()
             
-            self.logger.info("回測流程完成")
-            return analysis
+            self.logger.info(f"開始參數掃描: {len(param_grid)} 組參數 x {len(stock_data)} 檔股票")
+            sweep_results = sweep_parameters(
+                {symbol: _slice_period(data, start_date, end_date) for symbol, data in stock_data.items()},
+                param_grid,
+                commission=self.config.get_commission()
+            )
+            
+            if sweep_results.empty:
+                raise ValueError("參數掃描無結果，請確認參數組合與股票資料期間")
+            
+            # 以最佳參數執行完整回測
+            best = sweep_results.iloc[0]
+            sma_window = int(best['sma_window'])
+            high_window = int(best['high_window'])
+            self.logger.info(f"最佳參數: sma_window={sma_window}, high_window={high_window}")
+            
+            self.config.update('strategy.params.sma_window', sma_window)
+            self.config.update('strategy.params.high_window', high_window)
+            self._backtest(stock_data)
+            
+            self.logger.info("參數掃描完成")
+            return sweep_results
             
         except Exception as e:
-            self.logger.error(f"回測執行失敗: {str(e)}")
+            self.logger.error(f"參數掃描失敗: {str(e)}")
             raise
 
 
+def _backtest_group(
+    symbols: List[str],
+    strategy_class: Type[bt.Strategy],
+    start_date: str,
+    end_date: str,
+    config_path: str
+) -> Dict[str, Dict[str, Any]]:
+    """
+    在工作行程中依序執行一組股票的獨立回測
+    
+    同一組股票共用一個 BacktestRunner (設定、快取與日誌只初始化一次)，
+    每檔股票仍各自使用一個 Cerebro。
+    
+    Args:
+        symbols (List[str]): 此組的股票代碼清單
+        strategy_class (Type[bt.Strategy]): 策略類別
+        start_date (str): 開始日期
+        end_date (str): 結束日期
+        config_path (str): 設定檔路徑
+        
+    Returns:
+        Dict[str, Dict[str, Any]]: 股票代碼對應分析結果的字典 (回測失敗的股票不列入)
+    """
+    runner = BacktestRunner(config_path)
+    runner.config.update('start_date', start_date)
+    runner.config.update('end_date', end_date)
+    data_config = runner.config.get_data_config()
+    
+    results = {}
+    for symbol in symbols:
+        try:
+            data = runner.data_manager.download_stock_data(
+                symbol,
+                start_date,
+                end_date,
+                timeout=data_config.get('download_timeout', 30),
+                retry_attempts=data_config.get('retry_attempts', 3)
+            )
+            
+            runner._setup_cerebro(strategy_class)
+            runner._add_data_feeds({symbol: data})
+            strategies = runner._run_backtest()
+            results[symbol] = strategies[0].analyzers.metrics.get_analysis()
+        except Exception as e:
+            runner.logger.warning(f"股票 {symbol} 回測失敗: {str(e)}")
+    
+    return results
+
+
+def parallel_backtest(
+    symbols: List[str],
+    strategy_class: Type[bt.Strategy],
+    start_date: str,
+    end_date: str,
+    config_path: str = 'configs/default.yml',
+    max_workers: Optional[int] = None
+) -> Dict[str, Dict[str, Any]]:
+    """
+    以多行程平行執行每檔股票的獨立回測
+    
+    每檔股票各自使用一個 Cerebro 與設定檔中的初始資金，適合逐檔比較策略表現。
+    股票依工作行程數分組，每個行程處理一組；使用 joblib 的 loky 後端，
+    工作行程可於多次呼叫間重複使用，省去重新啟動與 Numba 載入的成本。
+    
+    Args:
+        symbols (List[str]): 股票代碼清單
+        strategy_class (Type[bt.Strategy]): 策略類別 (需定義於模組層級以便序列化)
+        start_date (str): 開始日期
+        end_date (str): 結束日期
+        config_path (str): 設定檔路徑
+        max_workers (Optional[int]): 最大行程數，預設為 CPU 核心數
+        
+    Returns:
+        Dict[str, Dict[str, Any]]: 股票代碼對應分析結果的字典
+    """
+    logger = create_backtest_logger("parallel")
+    n_jobs = min(max_workers or os.cpu_count() or 1, len(symbols)) or 1
+    
+    # 交錯分組，讓各組的股票數相近
+    groups = [symbols[i::n_jobs] for i in range(n_jobs)]
+    group_results = Parallel(n_jobs=n_jobs, prefer='processes')(
+        delayed(_backtest_group)(group, strategy_class, start_date, end_date, config_path)
+        for group in groups
+    )
+    
+    results = {}
+    for group_result in group_results:
+        results.update(group_result)
+    
+    logger.info(f"平行回測完成: {len(results)}/{len(symbols)} 檔")
+    
+    # 依原始股票順序輸出
+    return {symbol: results[symbol] for symbol in symbols if symbol in results}
+
+
 def run_download_test():
     """
     執行獨立的資料下載測試
@@ -0,0 +1,33 @@
+"""
+Breakout20 訊號掃描核心的預先編譯 (AOT) 腳本
+以 numba.pycc 將 scan_breakout 編譯為擴充模組 strategies/breakout_aot，
+匯入時不需 JIT 編譯或載入快取
+
+編譯時同時寫入核心原始碼雜湊 (breakout_aot.sha256)，核心修改後舊的擴充模組不會被載入；
+執行時需設定環境變數 BACKTESTKIT_USE_AOT=1 才會使用。
+numba.pycc 已被 numba 標記為即將棄用 (PendingDeprecationWarning)，未來版本可能移除。
+
+使用方式 (於專案根目錄執行)：
+    python -m strategies._breakout_aot
+"""
+
+from pathlib import Path
+
+from numba.pycc import CC
+
+from strategies._breakout_kernel import AOT_STAMP_FILE, scan_breakout, source_hash
+
+
+cc = CC('breakout_aot')
+cc.output_dir = str(Path(__file__).parent)
+
+# 與 JIT 版本共用同一份實作，確保結果一致
+cc.export(
+    'scan_breakout',
+    'Tuple((b1[:], b1[:]))(f8[:], f8[:], f8[:], f8[:], i8)'
+)(getattr(scan_breakout, 'py_func', scan_breakout))
+
+
+if __name__ == '__main__':
+    cc.compile()
+    (Path(cc.output_dir) / AOT_STAMP_FILE).write_text(source_hash())
@@ -0,0 +1,241 @@
+"""
+Breakout20 訊號掃描核心
+以 Numba 編譯移動平均/最高價計算與逐日狀態機，未安裝 numba 時以純 Python 執行（結果相同）
+"""
+
+import hashlib
+from pathlib import Path
+
+import numpy as np
+
+from utils._njit import njit, prange
+
+
+# 預先編譯擴充模組旁記錄核心原始碼雜湊的檔案
+AOT_STAMP_FILE = 'breakout_aot.sha256'
+
+
+def source_hash() -> str:
+    """
+    計算本模組原始碼的 SHA-256，用以判斷預先編譯的擴充模組是否與目前核心一致
+    
+    Returns:
+        str: 十六進位雜湊字串
+    """
+    return hashlib.sha256(Path(__file__).read_bytes()).hexdigest()
+
+
+@njit(cache=True)
+def rolling_mean(values, window):
+    """
+    線上計算移動平均 (每根K棒加入新值、移除舊值，O(1) 更新)
+    
+    以補償加總 (Kahan) 累計，視窗內含 NaN 時輸出 NaN，與 pandas rolling().mean() 一致
+    
+    Args:
+        values (np.ndarray): 輸入序列 (float64)
+        window (int): 視窗長度
+        
+    Returns:
+        np.ndarray: 移動平均 (前 window-1 筆為 NaN)
+    """
+    n = values.shape[0]
+    result = np.full(n, np.nan)
+    
+    total = 0.0
+    compensation = 0.0
+    nan_count = 0
+    
+    for i in range(n):
+        value = values[i]
+        if np.isnan(value):
+            nan_count += 1
+        else:
+            y = value - compensation
+            t = total + y
+            compensation = t - total - y
+            total = t
+        
+        if i >= window:
+            old = values[i - window]
+            if np.isnan(old):
+                nan_count -= 1
+            else:
+                y = -old - compensation
+                t = total + y
+                compensation = t - total - y
+                total = t
+        
+        if i >= window - 1 and nan_count == 0:
+            result[i] = total / window
+    
+    return result
+
+
+@njit(cache=True)
+def rolling_max(values, window):
+    """
+    以單調佇列線上計算移動最大值 (每根K棒攤銷 O(1))
+    
+    視窗內含 NaN 時輸出 NaN，與 pandas rolling().max() 一致
+    
+    Args:
+        values (np.ndarray): 輸入序列 (float64)
+        window (int): 視窗長度
+        
+    Returns:
+        np.ndarray: 移動最大值 (前 window-1 筆為 NaN)
+    """
+    n = values.shape[0]
+    result = np.full(n, np.nan)
+    
+    # 佇列存放候選最大值的位置，對應的值由前往後遞減
+    queue = np.empty(n, np.int64)
+    head = 0
+    tail = 0
+    nan_count = 0
+    
+    for i in range(n):
+        value = values[i]
+        if np.isnan(value):
+            nan_count += 1
+        else:
+            while tail > head and values[queue[tail - 1]] <= value:
+                tail -= 1
+            queue[tail] = i
+            tail += 1
+        
+        if i >= window and np.isnan(values[i - window]):
+            nan_count -= 1
+        
+        # 移除已離開視窗的位置
+        while tail > head and queue[head] <= i - window:
+            head += 1
+        
+        if i >= window - 1 and nan_count == 0:
+            result[i] = values[queue[head]]
+    
+    return result
+
+
+@njit(cache=True)
+def scan_breakout(close, low, sma, highest, warmup):
+    """
+    逐日掃描 Breakout20 的追蹤/進場/停損狀態機
+    
+    與 backtrader 的執行方式一致：訊號日下單，次一交易日成交；
+    進場最低價取成交當日最低價，平倉成交後重設追蹤狀態。
+    
+    Args:
+        close (np.ndarray): 收盤價 (float64)
+        low (np.ndarray): 最低價 (float64)
+        sma (np.ndarray): SMA值 (float64，暖機期為 NaN)
+        highest (np.ndarray): 過去N日最高價 (float64，暖機期為 NaN)
+        warmup (int): 暖機所需K棒數
+    
+    Returns:
+        Tuple[np.ndarray, np.ndarray]: 買入訊號、賣出訊號 (bool，標記於下單當日，最後一日的訊號不會成交)
+    """
+    n = close.shape[0]
+    entries = np.zeros(n, np.bool_)
+    exits = np.zeros(n, np.bool_)
+    
+    tracking = False
+    in_position = False
+    pending_buy = False
+    pending_sell = False
+    entry_low = 0.0
+    
+    for i in range(n):
+        # 處理前一日的掛單成交
+        if pending_buy:
+            pending_buy = False
+            in_position = True
+            entry_low = low[i]
+        elif pending_sell:
+            pending_sell = False
+            in_position = False
+            tracking = False
+        
+        if i + 1 < warmup:
+            continue
+        
+        if not in_position:
+            # 收盤價跌破SMA時啟動追蹤
+            if not tracking and close[i] < sma[i]:
+                tracking = True
+            # 追蹤中且收盤價突破過去最高價時進場
+            if tracking and close[i] > highest[i]:
+                entries[i] = True
+                pending_buy = True
+        elif low[i] < entry_low:
+            # 日內最低價跌破進場日最低價時停損
+            exits[i] = True
+            pending_sell = True
+    
+    return entries, exits
+
+
+@njit(cache=True, parallel=True)
+def sweep_breakout(opens, closes, highs, lows, offsets, params, commission):
+    """
+    對所有股票與參數組合執行 Breakout20 策略並統計交易結果
+    
+    各股票資料依序串接為一維陣列，第 s 檔位於 offsets[s]:offsets[s + 1]；
+    參數組合之間以 prange 平行計算。成交價為訊號次日開盤價，報酬扣除買賣手續費。
+    
+    Args:
+        opens (np.ndarray): 開盤價 (float64)
+        closes (np.ndarray): 收盤價 (float64)
+        highs (np.ndarray): 最高價 (float64)
+        lows (np.ndarray): 最低價 (float64)
+        offsets (np.ndarray): 各股票起始位置 (int64，長度為股票數 + 1)
+        params (np.ndarray): (sma_window, high_window) 參數組合 (int64，形狀為 (組合數, 2))
+        commission (float): 手續費率
+        
+    Returns:
+        Tuple[np.ndarray, np.ndarray, np.ndarray]: 交易次數、獲利次數、交易報酬總和 (形狀皆為 (組合數, 股票數))
+    """
+    n_params = params.shape[0]
+    n_symbols = offsets.shape[0] - 1
+    
+    trade_counts = np.zeros((n_params, n_symbols), np.int64)
+    win_counts = np.zeros((n_params, n_symbols), np.int64)
+    return_sums = np.zeros((n_params, n_symbols))
+    
+    for p in prange(n_params):
+        sma_window = params[p, 0]
+        high_window = params[p, 1]
+        
+        for s in range(n_symbols):
+            start = offsets[s]
+            end = offsets[s + 1]
+            n = end - start
+            if n == 0:
+                continue
+            
+            close = closes[start:end]
+            low = lows[start:end]
+            
+            # 過去N日最高價不含當日
+            sma = rolling_mean(close, sma_window)
+            highest = np.empty(n)
+            highest[0] = np.nan
+            highest[1:] = rolling_max(highs[start:end], high_window)[:-1]
+            
+            entries, exits = scan_breakout(close, low, sma, highest, max(sma_window, high_window))
+            
+            # 訊號於次日開盤成交，最後一日的訊號不會成交
+            entry_price = 0.0
+            for i in range(n - 1):
+                if entries[i]:
+                    entry_price = opens[start + i + 1]
+                elif exits[i]:
+                    exit_price = opens[start + i + 1]
+                    trade_return = exit_price * (1.0 - commission) / (entry_price * (1.0 + commission)) - 1.0
+                    trade_counts[p, s] += 1
+                    return_sums[p, s] += trade_return
+                    if trade_return > 0:
+                        win_counts[p, s] += 1
+    
+    return trade_counts, win_counts, return_sums
@@ -4,9 +4,272 @@ Breakout20 策略實作
 基於20日移動平均線和20日最高價突破的量化交易策略
 """
 
+import math
+import os
+import sys
+from collections import deque
+from pathlib import Path
+
 import backtrader as bt
+import numpy as np
+import pandas as pd
 from loguru import logger
-from typing import Dict, Any
+from typing import Dict, Any, List, Tuple
+
+# 直接以腳本執行時，加入專案根目錄以匯入本地模組
+if not __package__:
+    sys.path.append(str(Path(__file__).resolve().parent.parent))
+
+from strategies._breakout_kernel import (
+    AOT_STAMP_FILE, rolling_mean, rolling_max, scan_breakout, source_hash, sweep_breakout
+)
+
+
+def _load_aot_scan_breakout():
+    """
+    載入預先編譯的 scan_breakout (python -m strategies._breakout_aot 產生)
+    
+    需設定環境變數 BACKTESTKIT_USE_AOT=1，且編譯時記錄的核心雜湊與目前原始碼一致，
+    否則回傳 None 並改用 JIT 版本，避免過期的擴充模組覆蓋修改後的核心。
+    
+    Returns:
+        Optional[Callable]: 預先編譯的 scan_breakout，無法使用時為 None
+    """
+    if os.environ.get('BACKTESTKIT_USE_AOT') != '1':
+        return None
+    
+    try:
+        from strategies import breakout_aot
+    except ImportError:
+        logger.warning("找不到預先編譯的訊號核心，改用 JIT 版本")
+        return None
+    
+    stamp = Path(breakout_aot.__file__).with_name(AOT_STAMP_FILE)
+    if not stamp.is_file() or stamp.read_text().strip() != source_hash():
+        logger.warning("預先編譯的訊號核心與目前原始碼不一致，改用 JIT 版本")
+        return None
+    
+    return breakout_aot.scan_breakout
+
+
+# 預先編譯的擴充模組匯入時不需 JIT 編譯
+scan_breakout = _load_aot_scan_breakout() or scan_breakout
+
+# 逐K棒除錯日誌開關 (關閉時完全不建立訊息字串)
+_DEBUG = False
+
+
+# 資料來源欄位順序 (Breakout20Data 以欄位位置直接讀取)
+FEED_COLUMNS = ('open', 'high', 'low', 'close', 'volume', 'openinterest', 'sma', 'highest', 'track', 'breakout')
+
+
+def prepare_signals(data: pd.DataFrame, sma_window: int = 20, high_window: int = 20) -> pd.DataFrame:
+    """
+    以向量化方式預先計算整段期間的策略指標與訊號
+    
+    輸出欄位依 FEED_COLUMNS 排列且皆為 float64，索引為無時區的當地日期，
+    可直接作為 Breakout20Data 的資料來源 (輸入資料需已依日期排序，見 main._slice_period)。
+    
+    Args:
+        data (pd.DataFrame): 股票資料 (需包含 open, high, low, close, volume 欄位)
+        sma_window (int): SMA移動平均線週期
+        high_window (int): 最高價突破週期
+        
+    Returns:
+        pd.DataFrame: 價量資料附加 openinterest, sma, highest, track, breakout 欄位
+    """
+    # 只取需要的欄位並統一為 float64 (一次複製)
+    signals = data[['open', 'high', 'low', 'close', 'volume']].astype(np.float64)
+    signals['openinterest'] = 0.0
+    
+    # 保留當地交易日期，避免 backtrader 轉為 UTC 後日期偏移一天
+    if signals.index.tz is not None:
+        signals.index = signals.index.tz_localize(None)
+    
+    close = signals['close']
+    sma = close.rolling(sma_window).mean()
+    # 過去N日最高價不含當日，否則收盤價永遠無法突破
+    highest = signals['high'].rolling(high_window).max().shift(1)
+    
+    signals['sma'] = sma
+    signals['highest'] = highest
+    signals['track'] = (close < sma).to_numpy(dtype=np.float64)
+    signals['breakout'] = (close > highest).to_numpy(dtype=np.float64)
+    
+    return signals
+
+
+def generate_signals(data: pd.DataFrame, sma_window: int = 20, high_window: int = 20) -> pd.DataFrame:
+    """
+    不經 backtrader，以編譯後的狀態機一次產生整段期間的進出場訊號
+    
+    假設每筆掛單皆會成交；實際回測時資金不足或額外過濾條件可能使結果不同
+    
+    Args:
+        data (pd.DataFrame): 股票資料 (需包含 close, high, low 欄位)
+        sma_window (int): SMA移動平均線週期
+        high_window (int): 最高價突破週期
+        
+    Returns:
+        pd.DataFrame: 與原資料同索引的 entry, exit 布林訊號 (標記於下單當日)
+    """
+    close = data['close'].to_numpy(dtype=np.float64)
+    low = data['low'].to_numpy(dtype=np.float64)
+    high = data['high'].to_numpy(dtype=np.float64)
+    
+    # 指標同樣以編譯後的線上演算法計算；過去N日最高價不含當日
+    sma = rolling_mean(close, sma_window)
+    highest = np.concatenate(([np.nan], rolling_max(high, high_window)[:-1]))
+    
+    entries, exits = scan_breakout(close, low, sma, highest, max(sma_window, high_window))
+    
+    return pd.DataFrame({'entry': entries, 'exit': exits}, index=data.index)
+
+
+def sweep_parameters(
+    stock_data: Dict[str, pd.DataFrame],
+    param_grid: List[Tuple[int, int]],
+    commission: float = 0.0
+) -> pd.DataFrame:
+    """
+    不經 backtrader，一次計算所有股票在各參數組合下的交易結果
+    
+    假設每筆訊號皆以次日開盤價成交 (不考慮資金限制)，適合用於參數篩選
+    
+    Args:
+        stock_data (Dict[str, pd.DataFrame]): 股票資料字典
+        param_grid (List[Tuple[int, int]]): (sma_window, high_window) 參數組合清單
+        commission (float): 手續費率
+        
+    Returns:
+        pd.DataFrame: 各參數組合的交易統計，依交易報酬總和由高至低排序
+    """
+    frames = list(stock_data.values())
+    lengths = [len(frame) for frame in frames]
+    offsets = np.concatenate(([0], np.cumsum(lengths))).astype(np.int64)
+    
+    def column(name: str) -> np.ndarray:
+        return np.concatenate([frame[name].to_numpy(dtype=np.float64) for frame in frames])
+    
+    params = np.asarray(param_grid, dtype=np.int64).reshape(-1, 2)
+    
+    trade_counts, win_counts, return_sums = sweep_breakout(
+        column('open'), column('close'), column('high'), column('low'),
+        offsets, params, commission
+    )
+    
+    total_trades = trade_counts.sum(axis=1)
+    total_wins = win_counts.sum(axis=1)
+    total_returns = return_sums.sum(axis=1)
+    
+    with np.errstate(divide='ignore', invalid='ignore'):
+        win_rate = np.where(total_trades > 0, total_wins / total_trades * 100, 0.0)
+        avg_return = np.where(total_trades > 0, total_returns / total_trades * 100, 0.0)
+    
+    results = pd.DataFrame({
+        'sma_window': params[:, 0],
+        'high_window': params[:, 1],
+        'total_trades': total_trades,
+        'win_rate_pct': win_rate,
+        'avg_trade_return_pct': avg_return,
+        'sum_trade_return_pct': total_returns * 100,
+    })
+    
+    return results.sort_values('sum_trade_return_pct', ascending=False, ignore_index=True)
+
+
+class OnlineSMA(bt.Indicator):
+    """
+    線上更新的移動平均線
+    
+    維護視窗內的累計和，每根K棒加入新值、減去移出視窗的舊值 (O(1))；
+    NaN 不計入累計和，視窗內含 NaN 時輸出 NaN，移出視窗後即恢復 (與 rolling_mean 一致)
+    """
+    
+    lines = ('sma',)
+    params = (('period', 20),)
+    
+    def __init__(self):
+        """初始化視窗與累計和"""
+        self._window = deque(maxlen=self.p.period)
+        self._total = 0.0
+        self._nan_count = 0
+    
+    def next(self):
+        """加入當前值並更新平均"""
+        value = self.data[0]
+        if len(self._window) == self.p.period:
+            old = self._window[0]
+            if math.isnan(old):
+                self._nan_count -= 1
+            else:
+                self._total -= old
+        
+        self._window.append(value)
+        if math.isnan(value):
+            self._nan_count += 1
+        else:
+            self._total += value
+        
+        if len(self._window) == self.p.period and self._nan_count == 0:
+            self.lines.sma[0] = self._total / self.p.period
+
+
+class OnlineHighest(bt.Indicator):
+    """
+    線上更新的移動最高價
+    
+    以單調佇列保存視窗內可能成為最大值的候選值，每根K棒攤銷 O(1)
+    """
+    
+    lines = ('highest',)
+    params = (('period', 20),)
+    
+    def __init__(self):
+        """初始化候選佇列"""
+        self._candidates = deque()   # (K棒序號, 值)，值由前往後遞減
+        self._count = 0
+    
+    def next(self):
+        """加入當前值並更新最高價"""
+        value = self.data[0]
+        while self._candidates and self._candidates[-1][1] <= value:
+            self._candidates.pop()
+        self._candidates.append((self._count, value))
+        
+        # 移除已離開視窗的候選值
+        if self._candidates[0][0] <= self._count - self.p.period:
+            self._candidates.popleft()
+        
+        self._count += 1
+        if self._count >= self.p.period:
+            self.lines.highest[0] = self._candidates[0][1]
+
+
+class Breakout20Data(bt.feeds.PandasDirectData):
+    """
+    附帶預先計算訊號的資料來源
+    
+    欄位由 prepare_signals() 產生，以 itertuples 逐列依欄位位置讀取，
+    不需要 PandasData 每個欄位各自以 iloc 查詢；策略每根K棒只需讀取當前值
+    """
+    
+    lines = ('sma', 'highest', 'track', 'breakout')
+    
+    # 欄位位置 (0 為索引日期，其餘依 FEED_COLUMNS 順序)
+    params = (
+        ('datetime', 0),
+        ('open', 1),
+        ('high', 2),
+        ('low', 3),
+        ('close', 4),
+        ('volume', 5),
+        ('openinterest', 6),
+        ('sma', 7),
+        ('highest', 8),
+        ('track', 9),
+        ('breakout', 10),
+    )
 
 
 class Breakout20Strategy(bt.Strategy):
@@ -28,47 +291,65 @@ class Breakout20Strategy(bt.Strategy):
     
     def __init__(self):
         """初始化策略"""
+        n = len(self.datas)
+        
+        # 資料來源對應陣列位置 (所有狀態以陣列依位置存放)
+        self._idx = {data: i for i, data in enumerate(self.datas)}
+        
         # 追蹤每檔股票的狀態
-        self.tracking = {}           # 是否進入追蹤狀態
-        self.entry_low = {}          # 進場當日最低價
-        self.order_pending = {}      # 是否有掛單
-        
-        # 為每檔股票計算技術指標
-        self.sma = {}               # 20日移動平均線
-        self.highest = {}           # 20日最高價
-        
-        # 初始化每檔股票的指標和狀態
-        for i, data in enumerate(self.datas):
-            # 技術指標
-            self.sma[data] = bt.indicators.SimpleMovingAverage(
-                data.close, period=self.params.sma_window
-            )
-            self.highest[data] = bt.indicators.Highest(
-                data.high, period=self.params.high_window
-            )
+        self.tracking = np.zeros(n, dtype=np.bool_)    # 是否進入追蹤狀態
+        self.entry_low = np.full(n, np.nan)            # 進場當日最低價 (NaN 表示無)
+        self.order_pending = np.zeros(n, dtype=np.bool_)   # 是否有掛單
+        self.in_position = np.zeros(n, dtype=np.bool_)     # 是否持有部位
+        
+        # 判斷訊號前所需的K棒數
+        self._warmup = max(self.params.sma_window, self.params.high_window)
+        
+        # 每檔股票的技術指標與訊號
+        self.sma = []               # 20日移動平均線
+        self.highest = []           # 過去20日最高價
+        self.track_signal = []      # 收盤價跌破SMA
+        self.breakout_signal = []   # 收盤價突破過去最高價
+        
+        # 初始化每檔股票的指標
+        for data in self.datas:
+            if hasattr(data.lines, 'breakout'):
+                # 使用 Breakout20Data 預先計算的訊號
+                sma = data.sma
+                highest = data.highest
+                track_signal = data.track
+                breakout_signal = data.breakout
+            else:
+                # 一般資料來源改以線上指標逐K棒更新
+                sma = OnlineSMA(data.close, period=self.params.sma_window)
+                highest = OnlineHighest(data.high(-1), period=self.params.high_window)
+                track_signal = data.close < sma
+                breakout_signal = data.close > highest
             
-            # 初始狀態
-            self.tracking[data] = False
-            self.entry_low[data] = None
-            self.order_pending[data] = None
+            self.sma.append(sma)
+            self.highest.append(highest)
+            self.track_signal.append(track_signal)
+            self.breakout_signal.append(breakout_signal)
             
             logger.debug(f"策略初始化完成 - 股票: {data._name}")
     
-    def log(self, txt: str, dt=None, data_name: str = ""):
+    def log(self, txt: str, dt=None, data_name: str = "", **lazy_args):
         """
         記錄日誌
         
         Args:
-            txt (str): 日誌內容
+            txt (str): 日誌內容，可包含 {name} 形式的佔位符
             dt: 日期時間
             data_name (str): 股票名稱
+            **lazy_args: 佔位符對應的無參數函數，僅在日誌實際輸出時才求值
         """
         dt = dt or self.datas[0].datetime.date(0)
+        prefix = f'{dt.isoformat()} [{data_name}] '
         if self.params.printlog:
-            print(f'{dt.isoformat()} [{data_name}] {txt}')
+            print(prefix + txt.format(**{name: func() for name, func in lazy_args.items()}))
         
-        # 使用 loguru 記錄
-        logger.info(f'{dt.isoformat()} [{data_name}] {txt}')
+        # 使用 loguru 記錄 (lazy 模式下等級被過濾時不會格式化訊息)
+        logger.opt(lazy=True).info(prefix + txt, **lazy_args)
     
     def notify_order(self, order):
         """
@@ -79,42 +360,47 @@ class Breakout20Strategy(bt.Strategy):
         """
         data = order.data
         data_name = data._name
+        i = self._idx[data]
         
         if order.status in [order.Submitted, order.Accepted]:
             # 訂單已提交/已接受
-            self.order_pending[data] = order
+            self.order_pending[i] = True
             return
         
         if order.status in [order.Completed]:
             if order.isbuy():
                 # 買單完成
                 self.log(
-                    f'買入執行 - 價格: {order.executed.price:.2f}, '
-                    f'數量: {order.executed.size}, '
-                    f'手續費: {order.executed.comm:.2f}',
-                    data_name=data_name
+                    '買入執行 - 價格: {price:.2f}, 數量: {size}, 手續費: {comm:.2f}',
+                    data_name=data_name,
+                    price=lambda: order.executed.price,
+                    size=lambda: order.executed.size,
+                    comm=lambda: order.executed.comm
                 )
                 # 記錄進場當日最低價
-                self.entry_low[data] = data.low[0]
+                self.entry_low[i] = data.low[0]
+                self.in_position[i] = True
                 
             elif order.issell():
                 # 賣單完成
                 self.log(
-                    f'賣出執行 - 價格: {order.executed.price:.2f}, '
-                    f'數量: {order.executed.size}, '
-                    f'手續費: {order.executed.comm:.2f}',
-                    data_name=data_name
+                    '賣出執行 - 價格: {price:.2f}, 數量: {size}, 手續費: {comm:.2f}',
+                    data_name=data_name,
+                    price=lambda: order.executed.price,
+                    size=lambda: order.executed.size,
+                    comm=lambda: order.executed.comm
                 )
                 # 平倉後重設追蹤狀態
-                self.tracking[data] = False
-                self.entry_low[data] = None
+                self.tracking[i] = False
+                self.entry_low[i] = np.nan
+                self.in_position[i] = False
                 
         elif order.status in [order.Canceled, order.Margin, order.Rejected]:
             # 訂單被取消/保證金不足/被拒絕
             self.log(f'訂單取消/拒絕 - 狀態: {order.getstatusname()}', data_name=data_name)
         
         # 清除掛單記錄
-        self.order_pending[data] = None
+        self.order_pending[i] = False
     
     def notify_trade(self, trade):
         """
@@ -129,103 +415,97 @@ class Breakout20Strategy(bt.Strategy):
         if not trade.isclosed:
             return
         
-        # 計算交易績效
-        gross_pnl = trade.pnl
-        net_pnl = trade.pnlcomm
-        
+        # 交易績效僅在日誌實際輸出時才格式化
         self.log(
-            f'交易關閉 - 毛利: {gross_pnl:.2f}, 淨利: {net_pnl:.2f}',
-            data_name=data_name
+            '交易關閉 - 毛利: {gross_pnl:.2f}, 淨利: {net_pnl:.2f}',
+            data_name=data_name,
+            gross_pnl=lambda: trade.pnl,
+            net_pnl=lambda: trade.pnlcomm
         )
     
     def next(self):
-        """策略主邏輯"""
-        for data in self.datas:
-            self.process_data(data)
-    
-    def process_data(self, data):
         """
-        處理單一股票的策略邏輯
+        策略主邏輯
         
-        Args:
-            data: 股票資料物件
+        一次取得所有股票當前的訊號並以陣列運算篩選，只對需要下單的股票呼叫處理函數
         """
-        data_name = data._name
+        n = len(self.datas)
         
         # --- DEBUG LOGGING START ---
-        try:
-            log_msg = (
-                f"Processing Data - Stock: {data_name}, "
-                f"Date: {self.datetime.date(0)}, "
-                f"Data Len: {len(data)}, "
-                f"SMA: {self.sma[data][0] if len(self.sma[data]) > 0 else 'N/A'}, "
-                f"Highest: {self.highest[data][0] if len(self.highest[data]) > 0 else 'N/A'}"
-            )
-            logger.debug(log_msg)
-        except IndexError:
-            logger.warning(
-                f"IndexError during logging - Stock: {data_name}, "
-                f"Date: {self.datetime.date(0)}, "
-                f"Data Len: {len(data)}"
-            )
+        if _DEBUG:
+            for i, data in enumerate(self.datas):
+                # 以長度檢查取代例外處理，指標尚無數值時輸出 nan
+                sma_value = self.sma[i][0] if len(self.sma[i]) else float('nan')
+                highest_value = self.highest[i][0] if len(self.highest[i]) else float('nan')
+                logger.debug(
+                    f"Processing Data - Stock: {data._name}, "
+                    f"Date: {self.datetime.date(0)}, "
+                    f"Data Len: {len(data)}, "
+                    f"SMA: {sma_value}, "
+                    f"Highest: {highest_value}"
+                )
         # --- DEBUG LOGGING END ---
         
-        # 檢查是否有足夠的歷史資料
-        if len(data) < max(self.params.sma_window, self.params.high_window):
-            return
+        # 取得所有股票當前的K棒數、訊號與最低價
+        bar_count = np.fromiter((len(data) for data in self.datas), dtype=np.int64, count=n)
+        track = np.fromiter((line[0] for line in self.track_signal), dtype=np.float64, count=n)
+        breakout = np.fromiter((line[0] for line in self.breakout_signal), dtype=np.float64, count=n)
+        lows = np.fromiter((data.low[0] for data in self.datas), dtype=np.float64, count=n)
         
-        # 檢查是否有掛單
-        if self.order_pending[data]:
-            return
-        
-        # 取得當前價格和指標值
-        current_close = data.close[0]
-        current_low = data.low[0]
-        sma_value = self.sma[data][0]
-        highest_value = self.highest[data][0]
+        # 有足夠歷史資料且沒有掛單的股票
+        ready = (bar_count >= self._warmup) & ~self.order_pending
         
-        # 取得倉位資訊
-        position = self.getposition(data)
+        # 無倉位：需要啟動追蹤，或追蹤中且突破過去最高價
+        entry_candidates = ready & ~self.in_position & (
+            (~self.tracking & (track > 0)) | (self.tracking & (breakout > 0))
+        )
+        # 有倉位：日內最低價跌破進場時最低價 (無進場最低價時 NaN 比較為 False)
+        stop_candidates = ready & self.in_position & (lows < self.entry_low)
         
-        if not position:
-            # 無倉位時的邏輯
-            self.handle_no_position(data, current_close, sma_value, highest_value, data_name)
-        else:
-            # 有倉位時的邏輯
-            self.handle_with_position(data, current_low, data_name)
+        # 依股票順序處理，維持與逐檔判斷相同的下單順序
+        for i in np.flatnonzero(entry_candidates | stop_candidates):
+            data = self.datas[i]
+            if self.in_position[i]:
+                self.handle_with_position(data, lows[i], data._name)
+            else:
+                self.handle_no_position(data, track[i], breakout[i], data._name)
     
-    def handle_no_position(self, data, current_close: float, sma_value: float, 
-                          highest_value: float, data_name: str):
+    def handle_no_position(self, data, track_signal: float, breakout_signal: float,
+                          data_name: str):
         """
         處理無倉位時的邏輯
         
         Args:
             data: 股票資料物件
-            current_close (float): 當前收盤價
-            sma_value (float): SMA值
-            highest_value (float): 最高價值
+            track_signal (float): 收盤價是否跌破SMA (1.0/0.0)
+            breakout_signal (float): 收盤價是否突破過去最高價 (1.0/0.0)
             data_name (str): 股票名稱
         """
+        i = self._idx[data]
+        
         # 1. 檢查是否啟動追蹤：收盤價跌破20日SMA
-        if not self.tracking[data] and current_close < sma_value:
-            self.tracking[data] = True
+        if not self.tracking[i] and track_signal:
+            self.tracking[i] = True
             self.log(
-                f'啟動追蹤 - 收盤價 {current_close:.2f} < SMA {sma_value:.2f}',
-                data_name=data_name
+                '啟動追蹤 - 收盤價 {close:.2f} < SMA {sma:.2f}',
+                data_name=data_name,
+                close=lambda: data.close[0],
+                sma=lambda: self.sma[i][0]
             )
         
         # 2. 檢查進場條件：追蹤中且收盤價突破20日最高價
-        if (self.tracking[data] and 
-            current_close > highest_value):
+        if self.tracking[i] and breakout_signal:
             
             # Backtrader 會自動使用 sizer 計算部位大小，我們只需下單即可
             # 執行買入
-            order = self.buy(data=data)
-            self.order_pending[data] = order
+            self.buy(data=data)
+            self.order_pending[i] = True
             
             self.log(
-                f'買入信號 - 收盤價 {current_close:.2f} > 20日高點 {highest_value:.2f}',
-                data_name=data_name
+                '買入信號 - 收盤價 {close:.2f} > 20日高點 {highest:.2f}',
+                data_name=data_name,
+                close=lambda: data.close[0],
+                highest=lambda: self.highest[i][0]
             )
     
     def handle_with_position(self, data, current_low: float, data_name: str):
@@ -237,19 +517,21 @@ class Breakout20Strategy(bt.Strategy):
             current_low (float): 當前最低價
             data_name (str): 股票名稱
         """
+        i = self._idx[data]
         position = self.getposition(data)
         
-        # 停損條件：日內最低價跌破進場時最低價
-        if (self.entry_low[data] is not None and 
-            current_low < self.entry_low[data]):
+        # 停損條件：日內最低價跌破進場時最低價 (無進場最低價時為 NaN，比較結果為 False)
+        if current_low < self.entry_low[i]:
             
             # 執行賣出（以收盤價出場）
-            order = self.sell(data=data, size=position.size)
-            self.order_pending[data] = order
+            self.sell(data=data, size=position.size)
+            self.order_pending[i] = True
             
             self.log(
-                f'停損信號 - 當前低點 {current_low:.2f} < 進場低點 {self.entry_low[data]:.2f}',
-                data_name=data_name
+                '停損信號 - 當前低點 {low:.2f} < 進場低點 {entry_low:.2f}',
+                data_name=data_name,
+                low=lambda: current_low,
+                entry_low=lambda: self.entry_low[i]
             )
     
     
@@ -258,7 +540,7 @@ class Breakout20Strategy(bt.Strategy):
         self.log(f'策略結束 - 最終資產: {self.broker.getvalue():.2f}')
         
         # 統計追蹤狀態
-        tracking_count = sum(1 for tracking in self.tracking.values() if tracking)
+        tracking_count = int(np.count_nonzero(self.tracking))
         logger.info(f'策略結束時仍在追蹤的股票數量: {tracking_count}/{len(self.tracking)}')
 
 
@@ -283,6 +565,9 @@ class Breakout20StrategyOptimized(Breakout20Strategy):
         """初始化優化策略"""
         super().__init__()
         
+        # 目前持倉數量 (於成交通知時增減，不需每根K棒重新計算)
+        self._open_positions = 0
+        
         # 添加額外指標
         self.atr = {}  # Average True Range
         
@@ -292,14 +577,25 @@ class Breakout20StrategyOptimized(Breakout20Strategy):
                     data, period=self.params.atr_period
                 )
     
-    def handle_no_position(self, data, current_close: float, sma_value: float,
-                          highest_value: float, data_name: str):
+    def notify_order(self, order):
+        """
+        訂單狀態通知 (額外更新持倉數量)
+        
+        Args:
+            order: 訂單物件
+        """
+        if order.status == order.Completed:
+            self._open_positions += 1 if order.isbuy() else -1
+        
+        super().notify_order(order)
+    
+    def handle_no_position(self, data, track_signal: float, breakout_signal: float,
+                          data_name: str):
         """
         處理無倉位時的邏輯 (優化版本)
         """
         # 檢查最大持倉限制
-        current_positions = sum(1 for d in self.datas if self.getposition(d).size > 0)
-        if current_positions >= self.params.max_positions:
+        if self._open_positions >= self.params.max_positions:
             return
 
         # 檢查成交量
@@ -316,7 +612,7 @@ class Breakout20StrategyOptimized(Breakout20Strategy):
                     return
 
         # 呼叫基礎版本的邏輯
-        super().handle_no_position(data, current_close, sma_value, highest_value, data_name)
+        super().handle_no_position(data, track_signal, breakout_signal, data_name)
 
 
 def get_strategy_class(optimized: bool = False):
@@ -0,0 +1,39 @@
+"""
+檔案系統輔助函數
+以 os.scandir 一次列出目錄內容，取代逐一呼叫 os.path.exists
+"""
+
+import os
+from collections import defaultdict
+from typing import Iterable, List
+
+
+def missing_files(paths: Iterable[str]) -> List[str]:
+    """
+    找出不存在的檔案
+
+    依所在目錄分組，每個目錄只以 os.scandir 列出一次，再以集合判斷檔名是否存在
+
+    Args:
+        paths (Iterable[str]): 檔案路徑
+
+    Returns:
+        List[str]: 不存在的檔案路徑 (維持原始順序)
+    """
+    paths = list(paths)
+    by_dir = defaultdict(set)
+    for path in paths:
+        by_dir[os.path.dirname(path) or '.'].add(os.path.basename(path))
+    
+    present = {}
+    for dirname, names in by_dir.items():
+        try:
+            with os.scandir(dirname) as entries:
+                present[dirname] = {entry.name for entry in entries if entry.name in names}
+        except (FileNotFoundError, NotADirectoryError):
+            present[dirname] = set()
+    
+    return [
+        path for path in paths
+        if os.path.basename(path) not in present[os.path.dirname(path) or '.']
+    ]
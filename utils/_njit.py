@@ -0,0 +1,21 @@
+"""
+Numba JIT 相容層
+未安裝 numba 時，njit 退化為不做任何事的裝飾器（結果相同，只是速度較慢）
+"""
+
+try:
+    from numba import njit, prange
+    NUMBA_AVAILABLE = True
+except ImportError:
+    NUMBA_AVAILABLE = False
+    prange = range
+
+    def njit(*args, **kwargs):
+        """numba.njit 的替代品，直接回傳原函數"""
+        if len(args) == 1 and callable(args[0]) and not kwargs:
+            return args[0]
+
+        def decorator(func):
+            return func
+
+        return decorator
@@ -5,11 +5,102 @@
 """
 
 import os
-import yaml
+import sys
+import copy
+import functools
+import shutil
+import tempfile
 from pathlib import Path
-from typing import Dict, Any, List, Optional, Union
+from typing import Dict, Any, List, Optional, Tuple, Union
 from datetime import datetime
-from loguru import logger
+
+# 直接以腳本執行時，加入專案根目錄以匯入本地模組
+if not __package__:
+    sys.path.append(str(Path(__file__).resolve().parent.parent))
+
+from utils._fs import missing_files
+
+# yaml 與 loguru 於首次使用時才匯入，只讀取設定值的短命腳本不需負擔匯入成本
+logger = None
+
+
+def _get_logger():
+    """
+    取得 loguru logger (首次呼叫時匯入)
+    
+    Returns:
+        loguru logger
+    """
+    global logger
+    if logger is None:
+        from loguru import logger as _logger
+        logger = _logger
+    return logger
+
+
+@functools.lru_cache(maxsize=None)
+def _yaml_backend() -> tuple:
+    """
+    匯入 yaml 並選擇解析/輸出器 (首次呼叫時匯入)
+    
+    安裝 libyaml 時使用 C 實作的 CSafeLoader/CSafeDumper，否則退回純 Python 版本 (結果相同)
+    
+    Returns:
+        tuple: (yaml 模組, Loader, Dumper)
+    """
+    import yaml
+    try:
+        from yaml import CSafeLoader as Loader, CSafeDumper as Dumper
+    except ImportError:
+        from yaml import SafeLoader as Loader, SafeDumper as Dumper
+    return yaml, Loader, Dumper
+
+
+# 已解析的設定檔快取: (絕對路徑, 修改時間, 檔案大小) -> 設定內容
+# 檔案內容變動時修改時間或大小隨之改變，快取自然失效
+_YAML_CACHE: Dict[tuple, Dict[str, Any]] = {}
+
+# 設定檔必要的頂層鍵值
+_REQUIRED_KEYS = frozenset({
+    'start_date', 'end_date', 'symbol_files', 'strategy',
+    'cash', 'commission', 'slippage', 'sizer'
+})
+
+
+@functools.lru_cache(maxsize=256)
+def _split_key(key: str) -> Tuple[str, ...]:
+    """
+    拆解點號分隔的巢狀鍵值 (結果快取，同一鍵值只拆解一次)
+    
+    Args:
+        key (str): 設定鍵值
+        
+    Returns:
+        Tuple[str, ...]: 各層鍵值
+    """
+    return tuple(key.split('.'))
+
+
+def _cached_accessor(method):
+    """
+    快取無參數 get_* 存取函數的結果，於 update() 時清除
+    
+    Args:
+        method: ConfigLoader 的存取函數
+        
+    Returns:
+        快取結果的存取函數
+    """
+    name = method.__name__
+    
+    @functools.wraps(method)
+    def wrapper(self):
+        cache = self._accessor_cache
+        if name not in cache:
+            cache[name] = method(self)
+        return cache[name]
+    
+    return wrapper
 
 
 class ConfigLoader:
@@ -24,119 +115,143 @@ class ConfigLoader:
         """
         self.config_path = Path(config_path)
         self.config = {}
+        self._accessor_cache: Dict[str, Any] = {}
         self._load_config()
         self._validate_config()
         
-        logger.info(f"設定檔載入完成: {self.config_path}")
+        _get_logger().info(f"設定檔載入完成: {self.config_path}")
     
     def _load_config(self) -> None:
         """載入YAML設定檔"""
+        yaml, loader, _ = _yaml_backend()
+        
         try:
             if not self.config_path.exists():
                 raise FileNotFoundError(f"設定檔不存在: {self.config_path}")
             
-            with open(self.config_path, 'r', encoding='utf-8') as file:
-                self.config = yaml.safe_load(file)
+            stat = self.config_path.stat()
+            cache_key = (str(self.config_path.resolve()), stat.st_mtime_ns, stat.st_size)
+            
+            cached = _YAML_CACHE.get(cache_key)
+            if cached is None:
+                # 一次讀入位元組，由解析器自行解碼 UTF-8
+                cached = yaml.load(self.config_path.read_bytes(), Loader=loader)
+                _YAML_CACHE[cache_key] = cached
+            
+            # 回傳副本，update() 修改設定時不影響快取內容
+            self.config = copy.deepcopy(cached)
+            self._accessor_cache.clear()
             
-            logger.debug(f"成功載入設定檔: {self.config_path}")
+            _get_logger().debug(f"成功載入設定檔: {self.config_path}")
             
         except yaml.YAMLError as e:
-            logger.error(f"YAML格式錯誤: {str(e)}")
+            _get_logger().error(f"YAML格式錯誤: {str(e)}")
             raise
         except Exception as e:
-            logger.error(f"載入設定檔失敗: {str(e)}")
+            _get_logger().error(f"載入設定檔失敗: {str(e)}")
             raise
     
     def _validate_config(self) -> None:
         """驗證設定檔內容"""
-        required_keys = [
-            'start_date', 'end_date', 'symbol_files', 'strategy', 
-            'cash', 'commission', 'slippage', 'sizer'
-        ]
+        # 檢查必要的頂層鍵值 (以集合差集一次找出所有缺少的鍵值)
+        missing = _REQUIRED_KEYS - self.config.keys()
+        if missing:
+            raise ValueError(f"設定檔缺少必要參數: {sorted(missing)}")
         
-        # 檢查必要的頂層鍵值
-        for key in required_keys:
-            if key not in self.config:
-                raise ValueError(f"設定檔缺少必要參數: {key}")
+        # 一次取出各項設定，各驗證函數直接使用，不再重複查詢設定字典
+        config = self.config
         
         # 驗證日期格式
-        self._validate_dates()
+        self._validate_dates(config['start_date'], config['end_date'])
         
         # 驗證數值範圍
-        self._validate_numeric_values()
+        self._validate_numeric_values(config['cash'], config['commission'], config['slippage'], config['sizer'])
         
         # 驗證檔案路徑
-        self._validate_file_paths()
+        self._validate_file_paths(config['symbol_files'])
         
         # 驗證策略設定
-        self._validate_strategy_config()
+        self._validate_strategy_config(config['strategy'])
         
-        logger.debug("設定檔驗證通過")
+        _get_logger().debug("設定檔驗證通過")
     
-    def _validate_dates(self) -> None:
-        """驗證日期格式和範圍"""
-        date_format = '%Y-%m-%d'
+    def _validate_dates(self, start: str, end: str) -> None:
+        """
+        驗證日期格式和範圍
         
+        Args:
+            start (str): 開始日期
+            end (str): 結束日期
+        """
         try:
-            start_date = datetime.strptime(self.config['start_date'], date_format)
-            end_date = datetime.strptime(self.config['end_date'], date_format)
+            # 與 DataManager.validate_date_range 使用相同格式，接受的字串一致
+            start_date = datetime.strptime(start, '%Y-%m-%d')
+            end_date = datetime.strptime(end, '%Y-%m-%d')
             
             if start_date >= end_date:
                 raise ValueError("開始日期必須早於結束日期")
             
             # 檢查日期範圍合理性
             if start_date.year < 2000:
-                logger.warning("開始日期過早，可能沒有資料")
+                _get_logger().warning("開始日期過早，可能沒有資料")
             
             if end_date > datetime.now():
-                logger.warning("結束日期超過當前日期")
+                _get_logger().warning("結束日期超過當前日期")
                 
         except ValueError as e:
             raise ValueError(f"日期格式錯誤: {str(e)}")
     
-    def _validate_numeric_values(self) -> None:
-        """驗證數值參數"""
+    def _validate_numeric_values(self, cash: float, commission: float, slippage: float, sizer: Dict[str, Any]) -> None:
+        """
+        驗證數值參數
+        
+        Args:
+            cash (float): 初始資金
+            commission (float): 手續費率
+            slippage (float): 滑價
+            sizer (Dict[str, Any]): 部位大小設定
+        """
         # 驗證現金
-        cash = self.config.get('cash', 0)
         if cash <= 0:
             raise ValueError("初始資金必須大於0")
         
         # 驗證手續費率
-        commission = self.config.get('commission', 0)
         if commission < 0 or commission > 0.1:
             raise ValueError("手續費率必須在0-10%之間")
         
         # 驗證滑價
-        slippage = self.config.get('slippage', 0)
         if slippage < 0 or slippage > 0.1:
             raise ValueError("滑價必須在0-10%之間")
         
         # 驗證部位大小設定
-        sizer = self.config.get('sizer', {})
         if 'percents' in sizer:
             percents = sizer['percents']
             if percents <= 0 or percents > 100:
                 raise ValueError("部位百分比必須在0-100%之間")
     
-    def _validate_file_paths(self) -> None:
-        """驗證檔案路徑"""
-        symbol_files = self.config.get('symbol_files', [])
+    def _validate_file_paths(self, symbol_files: List[str]) -> None:
+        """
+        驗證檔案路徑
         
+        Args:
+            symbol_files (List[str]): 股票清單檔案路徑
+        """
         if not symbol_files:
             raise ValueError("必須指定至少一個股票清單檔案")
         
-        missing_files = []
-        for filepath in symbol_files:
-            if not os.path.exists(filepath):
-                missing_files.append(filepath)
+        # 每個目錄只列出一次內容，不逐檔查詢
+        missing = missing_files(symbol_files)
         
-        if missing_files:
-            logger.warning(f"以下股票清單檔案不存在: {missing_files}")
+        if missing:
+            _get_logger().warning(f"以下股票清單檔案不存在: {missing}")
     
-    def _validate_strategy_config(self) -> None:
-        """驗證策略設定"""
-        strategy = self.config.get('strategy', {})
+    def _validate_strategy_config(self, strategy: Dict[str, Any]) -> None:
+        """
+        驗證策略設定
         
+        Args:
+            strategy (Dict[str, Any]): 策略設定
+        """
         if 'name' not in strategy:
             raise ValueError("必須指定策略名稱")
         
@@ -166,52 +281,65 @@ class ConfigLoader:
         Returns:
             Any: 設定值
         """
-        keys = key.split('.')
+        # 單層鍵值直接查詢，不需拆解與逐層走訪
+        if '.' not in key:
+            return self.config.get(key, default)
+        
         value = self.config
         
         try:
-            for k in keys:
+            for k in _split_key(key):
                 value = value[k]
             return value
         except (KeyError, TypeError):
             return default
     
+    @_cached_accessor
     def get_start_date(self) -> str:
         """取得開始日期"""
         return self.config['start_date']
     
+    @_cached_accessor
     def get_end_date(self) -> str:
         """取得結束日期"""
         return self.config['end_date']
     
+    @_cached_accessor
     def get_symbol_files(self) -> List[str]:
         """取得股票清單檔案路徑"""
         return self.config['symbol_files']
     
+    @_cached_accessor
     def get_strategy_name(self) -> str:
         """取得策略名稱"""
         return self.config['strategy']['name']
     
+    @_cached_accessor
     def get_strategy_params(self) -> Dict[str, Any]:
         """取得策略參數"""
         return self.config['strategy']['params']
     
+    @_cached_accessor
     def get_initial_cash(self) -> float:
         """取得初始資金"""
         return float(self.config['cash'])
     
+    @_cached_accessor
     def get_commission(self) -> float:
         """取得手續費率"""
         return float(self.config['commission'])
     
+    @_cached_accessor
     def get_slippage(self) -> float:
         """取得滑價"""
         return float(self.config['slippage'])
     
+    @_cached_accessor
     def get_sizer_config(self) -> Dict[str, Any]:
         """取得部位大小設定"""
         return self.config['sizer']
     
+    @_cached_accessor
     def get_data_config(self) -> Dict[str, Any]:
         """取得資料設定"""
         return self.config.get('data', {
@@ -221,6 +349,7 @@ class ConfigLoader:
             'retry_attempts': 3
         })
     
+    @_cached_accessor
     def get_logging_config(self) -> Dict[str, Any]:
         """取得日誌設定"""
         return self.config.get('logging', {
@@ -230,6 +359,7 @@ class ConfigLoader:
             'retention': '30 days'
         })
     
+    @_cached_accessor
     def get_output_config(self) -> Dict[str, Any]:
         """取得輸出設定"""
         return self.config.get('output', {
@@ -246,16 +376,16 @@ class ConfigLoader:
             key (str): 設定鍵值，支援點號分隔的巢狀鍵值
             value (Any): 新的設定值
         """
-        keys = key.split('.')
+        keys = _split_key(key)
         config = self.config
         
+        # 逐層取得 (不存在時建立) 巢狀字典
         for k in keys[:-1]:
-            if k not in config:
-                config[k] = {}
-            config = config[k]
+            config = config.setdefault(k, {})
         
         config[keys[-1]] = value
-        logger.debug(f"更新設定: {key} = {value}")
+        self._accessor_cache.clear()
+        _get_logger().debug(f"更新設定: {key} = {value}")
     
     def save(self, output_path: Optional[str] = None) -> None:
         """
@@ -265,21 +395,45 @@ class ConfigLoader:
             output_path (Optional[str]): 輸出路徑，預設為原路徑
         """
         save_path = Path(output_path) if output_path else self.config_path
+        yaml, _, dumper = _yaml_backend()
         
         try:
-            with open(save_path, 'w', encoding='utf-8') as file:
-                yaml.dump(
-                    self.config, 
-                    file, 
-                    default_flow_style=False, 
-                    allow_unicode=True,
-                    indent=2
-                )
+            # 先寫入同目錄的暫存檔再原子替換，寫入中斷時原設定檔不會損毀
+            with tempfile.NamedTemporaryFile(
+                'w',
+                dir=save_path.parent,
+                prefix=save_path.name + '.',
+                suffix='.tmp',
+                encoding='utf-8',
+                delete=False
+            ) as file:
+                try:
+                    yaml.dump(
+                        self.config, 
+                        file, 
+                        Dumper=dumper,
+                        default_flow_style=False, 
+                        allow_unicode=True,
+                        indent=2
+                    )
+                    file.flush()
+                    os.fsync(file.fileno())
+                except BaseException:
+                    file.close()
+                    os.unlink(file.name)
+                    raise
+            
+            # 暫存檔預設權限為 0600，沿用原檔案權限
+            if save_path.exists():
+                shutil.copymode(save_path, file.name)
+            else:
+                os.chmod(file.name, 0o644)
+            os.replace(file.name, save_path)
             
-            logger.info(f"設定檔已儲存: {save_path}")
+            _get_logger().info(f"設定檔已儲存: {save_path}")
             
         except Exception as e:
-            logger.error(f"儲存設定檔失敗: {str(e)}")
+            _get_logger().error(f"儲存設定檔失敗: {str(e)}")
             raise
     
     def print_config(self) -> None:
@@ -288,16 +442,17 @@ class ConfigLoader:
         print("           設定檔內容")
         print("="*50)
         
-        def print_dict(d: Dict[str, Any], indent: int = 0):
-            """遞迴列印字典內容"""
-            for key, value in d.items():
-                if isinstance(value, dict):
-                    print("  " * indent + f"{key}:")
-                    print_dict(value, indent + 1)
-                else:
-                    print("  " * indent + f"{key}: {value}")
-        
-        print_dict(self.config)
+        # 以 YAML 格式一次輸出 (維持設定檔中的鍵值順序)
+        yaml, _, dumper = _yaml_backend()
+        yaml.dump(
+            self.config,
+            sys.stdout,
+            Dumper=dumper,
+            default_flow_style=False,
+            allow_unicode=True,
+            indent=2,
+            sort_keys=False
+        )
         print("="*50)
     
     def to_dict(self) -> Dict[str, Any]:
@@ -6,11 +6,40 @@
 
 import sys
 import os
+import functools
 from pathlib import Path
-from typing import Dict, Any, Optional
+from typing import Dict, Any, Optional, Set
 from loguru import logger
 
 
+# 預設日誌格式 (控制台含顏色標記，檔案為純文字)
+_DEFAULT_CONSOLE_FORMAT = (
+    "<green>{time:YYYY-MM-DD HH:mm:ss}</green> | "
+    "<level>{level: <8}</level> | "
+    "<cyan>{name}</cyan>:<cyan>{function}</cyan>:<cyan>{line}</cyan> | "
+    "<level>{message}</level>"
+)
+_DEFAULT_FILE_FORMAT = (
+    "{time:YYYY-MM-DD HH:mm:ss} | {level: <8} | "
+    "{name}:{function}:{line} | {message}"
+)
+
+# 已確認存在的日誌目錄 (同一目錄只建立一次)
+_ENSURED_DIRS: Set[Path] = set()
+
+
+def _ensure_dir(path: Path) -> None:
+    """
+    確保目錄存在，已確認過的目錄不再呼叫 mkdir
+    
+    Args:
+        path (Path): 目錄路徑
+    """
+    if path not in _ENSURED_DIRS:
+        path.mkdir(parents=True, exist_ok=True)
+        _ENSURED_DIRS.add(path)
+
+
 class LoggerConfig:
     """日誌設定管理器"""
     
@@ -46,13 +75,10 @@ class LoggerConfig:
             self.remove_all_handlers()
         
         # 預設格式
-        if format_string is None:
-            format_string = (
-                "<green>{time:YYYY-MM-DD HH:mm:ss}</green> | "
-                "<level>{level: <8}</level> | "
-                "<cyan>{name}</cyan>:<cyan>{function}</cyan>:<cyan>{line}</cyan> | "
-                "<level>{message}</level>"
-            )
+        format_string = format_string or _DEFAULT_CONSOLE_FORMAT
+        
+        # 僅在 DEBUG 等級輸出完整的例外堆疊與變數內容
+        debug_mode = level.upper() == 'DEBUG'
         
         # 設定控制台輸出
         if enable_console:
@@ -61,16 +87,15 @@ class LoggerConfig:
                 level=level,
                 format=format_string,
                 colorize=True,
-                backtrace=True,
-                diagnose=True
+                backtrace=debug_mode,
+                diagnose=debug_mode
             )
             self.handlers.append(console_handler)
         
         # 設定檔案輸出
         if enable_file and file_path:
             # 確保日誌目錄存在
-            log_path = Path(file_path)
-            log_path.parent.mkdir(parents=True, exist_ok=True)
+            _ensure_dir(Path(file_path).parent)
             
             file_handler = logger.add(
                 file_path,
@@ -79,8 +104,8 @@ class LoggerConfig:
                 rotation=rotation,
                 retention=retention,
                 compression="zip",
-                backtrace=True,
-                diagnose=True,
+                backtrace=debug_mode,
+                diagnose=debug_mode,
                 encoding="utf-8"
             )
             self.handlers.append(file_handler)
@@ -139,14 +164,9 @@ class LoggerConfig:
             int: 處理器ID
         """
         # 確保目錄存在
-        log_path = Path(file_path)
-        log_path.parent.mkdir(parents=True, exist_ok=True)
+        _ensure_dir(Path(file_path).parent)
         
-        if format_string is None:
-            format_string = (
-                "{time:YYYY-MM-DD HH:mm:ss} | {level: <8} | "
-                "{name}:{function}:{line} | {message}"
-            )
+        format_string = format_string or _DEFAULT_FILE_FORMAT
         
         handler_id = logger.add(
             file_path,
@@ -253,6 +273,20 @@ def remove_all_handlers() -> None:
     _logger_config.remove_all_handlers()
 
 
+@functools.lru_cache(maxsize=128)
+def _bound(name: str):
+    """
+    取得綁定模組名稱的 loguru logger (同一名稱共用同一個綁定實例)
+    
+    Args:
+        name (str): 日誌記錄器名稱
+        
+    Returns:
+        綁定 module 欄位的 logger
+    """
+    return logger.bind(module=name)
+
+
 class BacktestLogger:
     """回測專用日誌記錄器"""
     
@@ -264,7 +298,7 @@ class BacktestLogger:
             name (str): 日誌記錄器名稱
         """
         self.name = name
-        self.logger = logger.bind(module=name)
+        self.logger = _bound(name)
     
     def info(self, message: str, **kwargs) -> None:
         """記錄資訊等級日誌"""
@@ -298,12 +332,12 @@ class BacktestLogger:
             **kwargs: 其他參數
         """
         self.logger.info(
-            f"交易執行 - {symbol} {action} {size}股 @ {price:.2f}",
+            "交易執行 - {symbol} {action} {size}股 @ {price:.2f}",
+            **kwargs,
             symbol=symbol,
             action=action,
             price=price,
-            size=size,
-            **kwargs
+            size=size
         )
     
     def performance(self, metrics: Dict[str, Any]) -> None:
@@ -314,10 +348,15 @@ class BacktestLogger:
             metrics (Dict[str, Any]): 績效指標
         """
         self.logger.info(
-            f"績效指標 - 總報酬: {metrics.get('total_return_pct', 0):.2f}%, "
-            f"夏普比率: {metrics.get('sharpe_ratio', 0):.3f}, "
-            f"最大回撤: {metrics.get('max_drawdown_pct', 0):.2f}%",
-            **metrics
+            "績效指標 - 總報酬: {total_return_pct:.2f}%, "
+            "夏普比率: {sharpe_ratio:.3f}, "
+            "最大回撤: {max_drawdown_pct:.2f}%",
+            **{
+                'total_return_pct': 0,
+                'sharpe_ratio': 0,
+                'max_drawdown_pct': 0,
+                **metrics
+            }
         )
     
     def strategy_signal(self, symbol: str, signal_type: str, details: str, **kwargs) -> None:
@@ -331,11 +370,11 @@ class BacktestLogger:
             **kwargs: 其他參數
         """
         self.logger.info(
-            f"策略信號 - {symbol} {signal_type}: {details}",
+            "策略信號 - {symbol} {signal_type}: {details}",
+            **kwargs,
             symbol=symbol,
             signal_type=signal_type,
-            details=details,
-            **kwargs
+            details=details
         )
 
 
@@ -1,35 +1,139 @@
 ### === Module: verify_yfinance.py ===
 """獨立驗證 yfinance 是否能順利下載資料"""
 
+import functools
+import time
+from pathlib import Path
+
+import pandas as pd
 import yfinance as yf
 import warnings
 
 # yfinance 目前已自動處理所需的網路 Session
 # 若自行傳入 requests.Session 會在新版 yfinance 中造成錯誤
+# (yfinance 內部所有 Ticker 共用同一個 curl_cffi Session，連線會自動重複使用)
 
 
 # 抑制 yfinance 可能產生的警告
 warnings.filterwarnings('ignore', category=FutureWarning)
 
-def verify_download(symbol='2330.TW', start='2025-01-01', end='2025-01-31'):
+
+# 驗證結果快取：同一 (股票, 期間) 在有效期限內重複驗證時不需連線
+CACHE_DIR = Path.home() / '.cache' / 'backtestkit' / 'verify'
+CACHE_MAX_AGE = 24 * 60 * 60  # 秒
+
+
+class _EmptyHistoryError(Exception):
+    """history() 回傳空資料 (yfinance 預設會吞掉網路錯誤並回傳空 DataFrame)"""
+
+    def __init__(self, data):
+        super().__init__("history() 回傳空資料")
+        self.data = data
+
+
+# 可重試的暫時性錯誤：空資料、網路錯誤 (curl_cffi / requests 的例外皆繼承 OSError) 與流量限制
+# 舊版 yfinance 沒有 YFRateLimitError，此時只重試前兩者
+_RATE_LIMIT_ERROR = getattr(getattr(yf, 'exceptions', None), 'YFRateLimitError', None)
+_RETRYABLE_ERRORS = (_EmptyHistoryError, OSError) + ((_RATE_LIMIT_ERROR,) if _RATE_LIMIT_ERROR else ())
+
+
+def _retry(tries=3, base=0.5):
+    """
+    遇到暫時性錯誤時以指數退避重試 (等待 base, base*2, base*4... 秒)
+    """
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            for attempt in range(tries):
+                try:
+                    return func(*args, **kwargs)
+                except _RETRYABLE_ERRORS as e:
+                    if attempt == tries - 1:
+                        raise
+                    delay = base * 2 ** attempt
+                    print(f"   第 {attempt + 1} 次嘗試失敗 ({type(e).__name__})，{delay:.1f} 秒後重試...")
+                    time.sleep(delay)
+        return wrapper
+    return decorator
+
+
+@functools.lru_cache(maxsize=32)
+def _get_ticker(symbol):
+    """
+    取得股票的 Ticker 物件 (同一股票重複驗證時沿用同一物件)
+    """
+    return yf.Ticker(symbol)
+
+
+@_retry()
+def _fetch_history_checked(ticker, start, end):
+    """
+    下載歷史資料，空資料視為暫時性錯誤引發例外以便重試
+    """
+    data = ticker.history(start=start, end=end, timeout=30)
+    if data.empty:
+        raise _EmptyHistoryError(data)
+    return data
+
+
+def _fetch_history(ticker, start, end):
+    """
+    下載歷史資料 (失敗或空資料會自動重試，重試後仍為空資料時回傳空 DataFrame)
+    """
+    try:
+        return _fetch_history_checked(ticker, start, end)
+    except _EmptyHistoryError as e:
+        return e.data
+
+
+def _cache_path(symbol, start, end):
+    """
+    取得驗證結果的快取檔案路徑
+    """
+    return CACHE_DIR / f"{symbol}_{start}_{end}.parquet"
+
+
+def _cache_is_fresh(path):
+    """
+    檢查快取檔案是否存在且未超過有效期限
+    """
+    try:
+        return time.time() - path.stat().st_mtime < CACHE_MAX_AGE
+    except FileNotFoundError:
+        return False
+
+
+def verify_download(symbol='2330.TW', start='2025-01-01', end='2025-01-31', use_cache=True):
     """
     一個極簡的 yfinance 下載測試函式
+    
+    use_cache 為 True 時，24 小時內驗證成功過的相同股票與期間直接讀取快取，不需連線
     """
     print(f"--- 開始獨立驗證 yfinance ---")
     print(f"目標股票: {symbol}")
     print(f"時間範圍: {start} 到 {end}")
 
     try:
-        # 核心測試程式碼
-        # 在舊版範例中會自行建立 requests.Session 並傳入 Ticker
-        # 但自 yfinance 0.2.32 起禁止傳入非 curl_cffi session
-        print("\n1. 建立 Ticker 物件...")
-        ticker = yf.Ticker(symbol)
-        print(f"   Ticker 物件建立成功: {ticker}")
-
-        print("\n2. 呼叫 history() 方法下載資料...")
-        data = ticker.history(start=start, end=end, timeout=30)
-        print("   history() 方法執行完畢。")
+        cache_path = _cache_path(symbol, start, end)
+        if use_cache and _cache_is_fresh(cache_path):
+            print(f"\n使用 24 小時內的驗證快取: {cache_path}")
+            data = pd.read_parquet(cache_path)
+        else:
+            # 核心測試程式碼
+            # 在舊版範例中會自行建立 requests.Session 並傳入 Ticker
+            # 但自 yfinance 0.2.32 起禁止傳入非 curl_cffi session
+            print("\n1. 建立 Ticker 物件...")
+            ticker = _get_ticker(symbol)
+            print(f"   Ticker 物件建立成功: {ticker}")
+
+            print("\n2. 呼叫 history() 方法下載資料...")
+            data = _fetch_history(ticker, start, end)
+            print("   history() 方法執行完畢。")
+
+            # 只快取成功的結果，失敗時下次仍會重新連線驗證
+            if use_cache and not data.empty:
+                cache_path.parent.mkdir(parents=True, exist_ok=True)
+                data.to_parquet(cache_path)
 
         # 驗證結果
         print("\n--- 驗證結果 ---")